@@ -15,6 +15,21 @@ def create_app():
     migrate.init_app(app, db)
     jwt.init_app(app)
 
+    from app.jobs import job_queue
+    job_queue.init_app(app)
+
+    from app.extensions import rate_scheduler
+    rate_scheduler.init_app(app)
+
+    from app.recommender import recommender
+    recommender.init_app(app)
+
+    from app.search_index import catalog_search
+    catalog_search.init_app(app)
+
+    from app.scheduler import scheduler
+    scheduler.init_app(app)
+
     # Import after initializing extensions
     from app.routes import api_bp
     app.register_blueprint(api_bp)
@@ -5,7 +5,9 @@ from flask_jwt_extended import create_access_token
 from app import db
 from app.models import User
 from app.serializers import user_schema
-from app.extensions import sp, sp_oauth  # Changed import source
+import spotipy
+from app.extensions import sp_oauth, session as spotify_session, SPOTIFY_TIMEOUT  # Changed import source
+from app.tokens import token_store
 
 def register_user():
     """Register a new user and return a JWT token."""
@@ -115,11 +117,13 @@ def handle_spotify_callback(auth_code):
             print(f" Invalid token format: {type(token_info)} - {token_info}")
             return {"error": "Invalid Spotify token format"}, 500
 
-        session["spotify_token_info"] = token_info
-        sp.set_auth(token_info["access_token"])
-
-        #  Fetch Spotify User Profile
-        spotify_user = sp.current_user()
+        #  Fetch Spotify User Profile with a client bound to this token only
+        user_sp = spotipy.Spotify(
+            auth=token_info["access_token"],
+            requests_session=spotify_session,
+            requests_timeout=SPOTIFY_TIMEOUT
+        )
+        spotify_user = user_sp.current_user()
         spotify_username = spotify_user["id"]
         email = spotify_user.get("email", "")
 
@@ -144,6 +148,9 @@ def handle_spotify_callback(auth_code):
             db.session.add(user)
             db.session.commit()
 
+        #  Persist the token for this user (replaces the shared file cache)
+        token_store.save(user.id, token_info)
+
         # ✅ Generate JWT
         jwt_token = create_access_token(identity={
             "id": user.id,
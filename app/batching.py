@@ -0,0 +1,111 @@
+import logging
+import threading
+from concurrent.futures import Future
+
+from spotipy.exceptions import SpotifyException
+
+logger = logging.getLogger(__name__)
+
+
+def _is_bad_id_error(error):
+    """True when Spotify rejected the IDs themselves (400/404), so splitting the batch can help."""
+    return isinstance(error, SpotifyException) and error.http_status in (400, 404)
+
+
+class BatchLoader:
+    """DataLoader-style batcher that folds single-ID lookups into multi-ID calls.
+
+    IDs requested within `window` seconds (from any thread) are collected and
+    sent as one `batch_fn(ids)` call, which must return results in the same
+    order as the IDs it was given.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=50, window=0.01):
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self._pending = {}  # id -> Future, insertion ordered
+        self._timer = None
+        self._lock = threading.Lock()
+        self.requested = 0
+        self.batches = 0
+
+    def load(self, key):
+        """Return the result for a single ID, blocking until its batch completes."""
+        return self._enqueue(key).result()
+
+    def load_many(self, keys):
+        """Return results for several IDs, batched together with any concurrent callers."""
+        futures = [self._enqueue(key) for key in keys]
+        return [future.result() for future in futures]
+
+    def _enqueue(self, key):
+        batch = None
+        with self._lock:
+            self.requested += 1
+            future = self._pending.get(key)
+            if future is not None:
+                return future  # Same ID already waiting, share its result
+
+            future = Future()
+            self._pending[key] = future
+            if len(self._pending) >= self.max_batch_size:
+                batch = self._take_batch()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.window, self._flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if batch:
+            self._dispatch(batch)
+        return future
+
+    def _take_batch(self):
+        """Detach the pending IDs. Caller must hold the lock."""
+        batch = self._pending
+        self._pending = {}
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def _flush(self):
+        with self._lock:
+            batch = self._take_batch()
+        if batch:
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        keys = list(batch.keys())
+        with self._lock:
+            self.batches += 1
+        try:
+            results = self.batch_fn(keys)
+        except Exception as e:
+            if len(keys) > 1 and _is_bad_id_error(e):
+                # One bad ID fails the whole multi-ID call, so isolate it
+                logger.warning(f"Batch of {len(keys)} rejected, retrying individually: {str(e)}")
+                for key in keys:
+                    self._dispatch({key: batch[key]})
+                return
+            # Outages, timeouts and rate limits would fail every single-ID call too
+            for future in batch.values():
+                future.set_exception(e)
+            return
+
+        results = list(results or [])
+        results += [None] * (len(keys) - len(results))
+        for key, result in zip(keys, results):
+            if result is None:
+                batch[key].set_exception(LookupError(f"No result for id '{key}'"))
+            else:
+                batch[key].set_result(result)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requested": self.requested,
+                "batches": self.batches,
+                "max_batch_size": self.max_batch_size,
+                "window_ms": int(self.window * 1000)
+            }
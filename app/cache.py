@@ -0,0 +1,132 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from app.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """Two-tier TTL cache: a bounded in-process LRU in front of an optional Redis.
+
+    Expired local entries stay until the LRU evicts them, so get_stale() can
+    still serve them while the source is down.
+    """
+
+    def __init__(self, name, max_entries=1024, redis_client=None):
+        self.name = name
+        self.max_entries = max_entries
+        self.redis = redis_client
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.stale_hits = 0
+        self.flights = SingleFlight(name, redis_client)
+
+    def _redis_key(self, key):
+        return f"{self.name}:{key}"
+
+    def _store_local(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)  # Evict least recently used
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(self._redis_key(key))
+                if raw is not None:
+                    ttl = self.redis.ttl(self._redis_key(key))
+                    value = json.loads(raw)
+                    if ttl and ttl > 0:
+                        self._store_local(key, value, ttl)
+                    with self._lock:
+                        self.redis_hits += 1
+                    return value
+            except Exception as e:
+                logger.warning(f"Redis cache read failed for {self.name}: {str(e)}")
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def get_stale(self, key):
+        """Return the local value for key even if it expired, or None (for serving during outages)."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self.stale_hits += 1
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        """Store value under key in both tiers for ttl seconds."""
+        self._store_local(key, value, ttl)
+        if self.redis is not None:
+            try:
+                self.redis.set(self._redis_key(key), json.dumps(value), ex=int(ttl))
+            except Exception as e:
+                logger.warning(f"Redis cache write failed for {self.name}: {str(e)}")
+
+    def get_or_fetch(self, key, fetch, ttl):
+        """Return the cached value for key, calling fetch() and caching its result on a miss.
+
+        Concurrent misses for the same key share one fetch (across processes when Redis is up).
+        """
+        value = self.get(key)
+        if value is None:
+            value = self.flights.do(key, lambda: self._fetch_and_store(key, fetch, ttl), lookup=lambda: self.get(key))
+        return value
+
+    def _fetch_and_store(self, key, fetch, ttl):
+        value = fetch()
+        self.set(key, value, ttl)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.redis_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+                "stale_hits": self.stale_hits,
+                "hit_ratio": round((self.hits + self.redis_hits) / lookups, 4) if lookups else 0.0,
+                "redis_enabled": self.redis is not None,
+                "singleflight": self.flights.stats()
+            }
+
+
+def connect_redis(url):
+    """Build a Redis client for url, or return None when unset or unreachable."""
+    if not url:
+        return None
+    try:
+        import redis
+        client = redis.Redis.from_url(url, socket_timeout=0.5, socket_connect_timeout=0.5)
+        client.ping()
+        return client
+    except Exception as e:
+        logger.warning(f"Redis unavailable at {url}, using in-process cache only: {str(e)}")
+        return None
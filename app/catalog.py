@@ -0,0 +1,97 @@
+import logging
+from datetime import datetime
+
+from app import db
+from app.models import CatalogTrack
+from app.upsert import upsert
+from app.extensions import artist_loader
+
+logger = logging.getLogger(__name__)
+
+_COLUMNS = ("spotify_track_id", "name", "artist", "album", "album_id", "release_date", "popularity", "duration_ms",
+            "genres")
+
+
+def catalog_row(track, album=None):
+    """Flatten a Spotify track object (full or simplified) into a catalog row, or None if it has no ID.
+
+    Simplified tracks (e.g. from an album response) carry no album, so pass the parent album.
+    """
+    if not track or not track.get("id"):
+        return None
+    album = track.get("album") or album or {}
+    artists = track.get("artists") or []
+    return {
+        "spotify_track_id": track["id"],
+        "name": track.get("name"),
+        "artist": artists[0].get("name") if artists else None,
+        "album": album.get("name"),
+        "album_id": album.get("id"),
+        "release_date": album.get("release_date"),
+        "popularity": track.get("popularity"),
+        "duration_ms": track.get("duration_ms")
+    }
+
+
+def record_rows(rows):
+    """Upsert catalog rows in the current session (caller commits).
+
+    Missing attributes never overwrite values we already know, so a projected
+    or simplified response cannot erase data from a richer one.
+    """
+    values = {}
+    for row in rows:
+        if row and row.get("spotify_track_id") and row.get("name"):
+            values[row["spotify_track_id"]] = {column: row.get(column) for column in _COLUMNS}
+    if not values:
+        return 0
+
+    upsert(
+        CatalogTrack,
+        [dict(v, updated_at=datetime.utcnow()) for v in values.values()],
+        index_elements=["spotify_track_id"],
+        update=[column for column in _COLUMNS if column != "spotify_track_id"] + ["updated_at"],
+        coalesce=True
+    )
+    return len(values)
+
+
+def record_tracks(tracks, album=None):
+    """Upsert catalog rows from Spotify track objects in the current session (caller commits)."""
+    return record_rows(catalog_row(track, album) for track in tracks)
+
+
+def genre_rows(tracks):
+    """Catalog rows tagged with the primary artist's genres, looked up in one batched artists call.
+
+    Genres are best effort: a failed lookup leaves them unset rather than failing the caller.
+    """
+    tracks = [track for track in tracks if track and track.get("id")]
+    artist_ids = list(dict.fromkeys(
+        track["artists"][0]["id"] for track in tracks if track.get("artists") and track["artists"][0].get("id")
+    ))
+    genres = {}
+    try:
+        for artist in artist_loader.load_many(artist_ids):
+            if artist.get("genres"):
+                genres[artist["id"]] = ",".join(artist["genres"])[:500]
+    except Exception as e:
+        logger.warning(f"Genre lookup failed: {str(e)}")
+
+    rows = []
+    for track in tracks:
+        row = catalog_row(track)
+        artists = track.get("artists") or []
+        row["genres"] = genres.get(artists[0].get("id")) if artists else None
+        rows.append(row)
+    return rows
+
+
+def remember_tracks(tracks, album=None):
+    """Best-effort catalog capture for read paths: record and commit, never raise."""
+    try:
+        if record_tracks(tracks, album):
+            db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        logger.warning(f"Catalog capture failed: {str(e)}")
@@ -0,0 +1,136 @@
+import collections
+import logging
+import threading
+import time
+
+import requests
+from spotipy.exceptions import SpotifyException
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(SpotifyException):
+    """Raised instead of calling Spotify while the breaker is open (reported as a 503)."""
+
+    def __init__(self, retry_after):
+        self.retry_after = max(1, int(retry_after + 0.999))
+        super().__init__(
+            503, -1, "Spotify is unavailable, not calling it for now",
+            headers={"Retry-After": str(self.retry_after)}
+        )
+
+
+def is_unavailable(error):
+    """True when error means Spotify could not answer (outage, timeout, retries exhausted, breaker open)."""
+    if isinstance(error, requests.RequestException):
+        return True
+    return isinstance(error, SpotifyException) and (error.http_status == 429 or error.http_status >= 500)
+
+
+class CircuitBreaker:
+    """Fails Spotify calls fast once they keep failing, then lets probes through to detect recovery.
+
+    - Closed: calls go out and outcomes are counted. The breaker opens after
+      `consecutive_failures` failures in a row, or when at least `min_calls`
+      of the last `window` calls include a `failure_ratio` share of failures.
+    - Open: calls raise CircuitOpenError without touching the network until
+      `reset_timeout` has passed.
+    - Half open: up to `half_open_probes` calls go out. A success closes the
+      breaker and a failure opens it for another reset_timeout.
+
+    Failures are connection errors, timeouts and 5xx. A 429 or other 4xx is
+    Spotify answering, so it counts as a success here.
+    """
+
+    def __init__(self, consecutive_failures=5, failure_ratio=0.5, window=20, min_calls=10, reset_timeout=30.0,
+                 half_open_probes=1):
+        self.consecutive_failures = consecutive_failures
+        self.failure_ratio = failure_ratio
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self.half_open_probes = half_open_probes
+        self.state = CLOSED
+        self._outcomes = collections.deque(maxlen=window)  # True for a failure
+        self._streak = 0
+        self._open_until = 0.0
+        self._probes = 0
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.rejected = 0
+
+    def before_call(self):
+        """Admit one call or raise CircuitOpenError; every admitted call must be followed by record()."""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN:
+                if now < self._open_until:
+                    self.rejected += 1
+                    raise CircuitOpenError(self._open_until - now)
+                self.state = HALF_OPEN
+                self._probes = 0
+                logger.info("Spotify circuit half open, probing")
+            if self.state == HALF_OPEN:
+                if self._probes >= self.half_open_probes:
+                    self.rejected += 1
+                    raise CircuitOpenError(1)
+                self._probes += 1
+
+    def record(self, failed):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probes = max(0, self._probes - 1)  # Calls admitted before opening also land here
+                if failed:
+                    self._open()
+                else:
+                    self.state = CLOSED
+                    self._outcomes.clear()
+                    self._streak = 0
+                    logger.info("Spotify circuit closed, Spotify is answering again")
+                return
+            if self.state == OPEN:
+                return  # A call admitted before the breaker opened
+
+            self._outcomes.append(failed)
+            self._streak = self._streak + 1 if failed else 0
+            failures = sum(self._outcomes)
+            if self._streak >= self.consecutive_failures or (
+                    len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_ratio):
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self._open_until = time.monotonic() + self.reset_timeout
+        self._outcomes.clear()
+        self._streak = 0
+        self.opened += 1
+        logger.warning(f"Spotify circuit open, failing Spotify calls fast for {self.reset_timeout}s")
+
+    def is_open(self):
+        """True while a call would be rejected (open, or half open with every probe already out)."""
+        with self._lock:
+            if self.state == OPEN:
+                return time.monotonic() < self._open_until
+            return self.state == HALF_OPEN and self._probes >= self.half_open_probes
+
+    def is_closed(self):
+        with self._lock:
+            return self.state == CLOSED
+
+    def retry_after(self):
+        with self._lock:
+            return max(1, int(self._open_until - time.monotonic() + 0.999))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "recent_calls": len(self._outcomes),
+                "recent_failures": sum(self._outcomes),
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "open_for": round(max(0.0, self._open_until - time.monotonic()), 2) if self.state == OPEN else 0.0
+            }
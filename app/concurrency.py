@@ -0,0 +1,44 @@
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+
+#  Shared pool for independent outbound Spotify calls
+MAX_CONCURRENCY = int(os.getenv("SPOTIFY_MAX_CONCURRENCY", "8"))
+
+executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="spotify-fanout")
+_worker = threading.local()
+
+
+def _run_in_worker(call):
+    _worker.active = True
+    try:
+        return call()
+    finally:
+        _worker.active = False
+
+
+def fan_out(*calls):
+    """Run independent zero-argument callables concurrently and return their results in call order.
+
+    Calls made from inside a pool worker run inline so nested fan-outs cannot
+    starve the bounded pool. The first failing call's exception is re-raised.
+    """
+    if len(calls) <= 1 or getattr(_worker, "active", False):
+        return [call() for call in calls]
+
+    # Each call keeps the caller's context (e.g. its Spotify rate priority and user)
+    futures = [executor.submit(contextvars.copy_context().run, _run_in_worker, call) for call in calls]
+    return [future.result() for future in futures]
+
+
+def run_async(call):
+    """Start one call on the pool and return its Future (runs inline inside a pool worker)."""
+    if getattr(_worker, "active", False):
+        future = Future()
+        try:
+            future.set_result(call())
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    return executor.submit(contextvars.copy_context().run, _run_in_worker, call)
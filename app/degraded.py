@@ -0,0 +1,64 @@
+from sqlalchemy import func
+
+from app import db
+from app.models import CatalogTrack
+from app.spotify_ids import is_valid_spotify_id
+
+#  Read fallbacks used while Spotify is unavailable: catalog rows shaped like the Spotify objects they replace
+
+
+def _spotify_track(row):
+    return {
+        "id": row.spotify_track_id,
+        "name": row.name,
+        "artists": [{"name": row.artist}] if row.artist else [],
+        "album": {"id": row.album_id, "name": row.album, "release_date": row.release_date},
+        "popularity": row.popularity,
+        "duration_ms": row.duration_ms,
+        "uri": f"spotify:track:{row.spotify_track_id}",
+        "preview_url": None
+    }
+
+
+def _contains(column, text):
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return column.ilike(f"%{escaped}%", escape="\\")
+
+
+def local_track(track_id):
+    """Return the cataloged track as a Spotify track object, or None."""
+    if not is_valid_spotify_id(track_id):
+        return None
+    row = db.session.get(CatalogTrack, track_id)
+    return _spotify_track(row) if row else None
+
+
+def local_album(album_id):
+    """Return an album assembled from its cataloged tracks, or None (cover art and track numbers are unknown)."""
+    rows = CatalogTrack.query.filter_by(album_id=album_id).order_by(CatalogTrack.name).all()
+    if not rows:
+        return None
+    return {
+        "id": album_id,
+        "name": rows[0].album,
+        "artists": [{"name": rows[0].artist}] if rows[0].artist else [],
+        "release_date": rows[0].release_date,
+        "images": [],
+        "tracks": {"items": [{"id": row.spotify_track_id, "name": row.name, "track_number": None} for row in rows]}
+    }
+
+
+def local_search(artist=None, year=None, genre=None, limit=10):
+    """Search the catalog like a Spotify track search, most popular first; None when nothing matches."""
+    query = CatalogTrack.query
+    if artist:
+        query = query.filter(_contains(CatalogTrack.artist, artist))
+    if year:
+        query = query.filter(CatalogTrack.release_date.like(f"{int(year)}%"))
+    if genre:
+        query = query.filter(_contains(CatalogTrack.genres, genre))
+    total = query.count()
+    if not total:
+        return None
+    rows = query.order_by(func.coalesce(CatalogTrack.popularity, 0).desc()).limit(limit).all()
+    return {"tracks": {"items": [_spotify_track(row) for row in rows], "total": total}}
@@ -1,46 +1,115 @@
 
-from spotipy.oauth2 import SpotifyOAuth
+from spotipy.oauth2 import SpotifyOAuth, SpotifyClientCredentials
+from spotipy.cache_handler import CacheHandler, MemoryCacheHandler
 import spotipy
 import os
-import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 from dotenv import load_dotenv
-
+from app.cache import ResponseCache, connect_redis
+from app.singleflight import SingleFlight
+from app.batching import BatchLoader
+from app.rate_limit import RateScheduler, AdaptiveLimiter, ScheduledSession
+from app.circuit import CircuitBreaker
 
 
 load_dotenv()
 
-# Configure retry strategy with backoff
+# Configure retry strategy with backoff (429s are handled by the rate scheduler)
 retry_strategy = Retry(
     total=3,  # Total retry attempts
     backoff_factor=1,  # Wait 1s, 2s, 4s between retries
-    status_forcelist=[429, 500, 502, 503, 504],  # Retry on these status codes
-    allowed_methods=["GET", "POST", "PUT", "DELETE"]  # Retry on all HTTP methods
+    status_forcelist=[500, 502, 503, 504],  # Retry on these status codes
+    allowed_methods=["GET", "POST", "PUT", "DELETE"],  # Retry on all HTTP methods
+    respect_retry_after_header=False  # Otherwise urllib3 retries 429s itself, outside the shared scheduler
 )
 
 # Create custom HTTP adapter with retry logic
 adapter = HTTPAdapter(max_retries=retry_strategy)
 
-# Configure session with timeout and retry
-session = requests.Session()
+#  Shared Redis for caches and the rate scheduler (None when unset or unreachable)
+redis_client = connect_redis(os.getenv("REDIS_URL"))
+
+#  One token bucket for every outbound Web API call, shared across workers through Redis
+rate_scheduler = RateScheduler(
+    rate=float(os.getenv("SPOTIFY_RATE_PER_SECOND", "10")),
+    burst=int(os.getenv("SPOTIFY_RATE_BURST", "20")),
+    reserve=float(os.getenv("SPOTIFY_BACKGROUND_RESERVE", "0.25")),
+    redis_client=redis_client
+)
+
+#  Caps in-flight Spotify requests per process, shrinking when Spotify slows down or errors
+concurrency_limiter = AdaptiveLimiter(
+    initial=int(os.getenv("SPOTIFY_INITIAL_IN_FLIGHT", "8")),
+    max_limit=int(os.getenv("SPOTIFY_MAX_IN_FLIGHT", "64"))
+)
+
+#  Fails Spotify calls fast during an outage instead of letting them wait out timeouts and retries
+spotify_breaker = CircuitBreaker(
+    consecutive_failures=int(os.getenv("SPOTIFY_BREAKER_FAILURES", "5")),
+    reset_timeout=float(os.getenv("SPOTIFY_BREAKER_RESET_SECONDS", "30"))
+)
+
+# Configure session with timeout, retry, circuit breaker, concurrency limit and rate scheduling
+session = ScheduledSession(rate_scheduler, concurrency_limiter, spotify_breaker)
 session.mount("https://", adapter)
 session.mount("http://", adapter)
 
+#  Connect timeout: 3.05s, Read timeout: 10s
+SPOTIFY_TIMEOUT = (3.05, 10)
+
+class NoTokenCache(CacheHandler):
+    """Cache handler that keeps nothing, so a shared SpotifyOAuth never holds (or hands out) a user's token."""
+
+    def get_cached_token(self):
+        return None
+
+    def save_token_to_cache(self, token_info):
+        return None
+
+
 #  Initialize Spotify OAuth (Ensures Token Refresh & Correct Scope)
+#  Used only for the authorize URL, code exchange and refreshes; per-user tokens live in app.tokens
 sp_oauth = SpotifyOAuth(
     client_id=os.getenv("SPOTIFY_CLIENT_ID"),
     client_secret=os.getenv("SPOTIFY_CLIENT_SECRET"),
     redirect_uri="http://localhost:5000/callback",  #  Matches your redirect route
     scope = "playlist-read-collaborative user-read-private playlist-modify-public playlist-modify-private user-library-read user-library-modify playlist-read-private user-top-read",
-    cache_path=".spotifycache",  # Added cache path for token persistence
+    cache_handler=NoTokenCache(),  # Tokens only ever come from the per-user TokenStore
     requests_session=session # Use our custom session
 )
 
-# Initialize Spotipy client with timeout settings
+#  App-level client for catalog reads (search, tracks, albums, public playlists)
 sp = spotipy.Spotify(
-    auth_manager=sp_oauth,
-    requests_timeout=(3.05, 10),  # Connect timeout: 3.05s, Read timeout: 10s
-    requests_session=session,
-    retries=3  # Additional layer of retries
-)
\ No newline at end of file
+    auth_manager=SpotifyClientCredentials(
+        client_id=os.getenv("SPOTIFY_CLIENT_ID"),
+        client_secret=os.getenv("SPOTIFY_CLIENT_SECRET"),
+        cache_handler=MemoryCacheHandler(),
+        requests_session=session
+    ),
+    requests_timeout=SPOTIFY_TIMEOUT,
+    requests_session=session  # spotipy's own retries only apply to sessions it builds
+)
+
+#  Shared cache for Spotify catalog reads (tracks, albums, searches)
+catalog_cache = ResponseCache(
+    "spotify-catalog",
+    max_entries=int(os.getenv("CATALOG_CACHE_SIZE", "2048")),
+    redis_client=redis_client
+)
+
+#  Shares one in-flight Spotify call among concurrent identical requests that are not cached
+spotify_flights = SingleFlight("spotify", redis_client)
+
+#  Normalized track/artist -> Spotify track resolutions, including negative results
+resolution_cache = ResponseCache(
+    "track-resolution",
+    max_entries=int(os.getenv("RESOLUTION_CACHE_SIZE", "4096")),
+    redis_client=redis_client
+)
+
+#  Coalesce single track/album/artist lookups into Spotify's multi-ID endpoints (max 50 IDs, 20 for albums)
+batch_window = float(os.getenv("SPOTIFY_BATCH_WINDOW_MS", "10")) / 1000
+track_loader = BatchLoader(lambda ids: sp.tracks(ids)["tracks"], max_batch_size=50, window=batch_window)
+album_loader = BatchLoader(lambda ids: sp.albums(ids)["albums"], max_batch_size=20, window=batch_window)
+artist_loader = BatchLoader(lambda ids: sp.artists(ids)["artists"], max_batch_size=50, window=batch_window)
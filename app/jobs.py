@@ -0,0 +1,172 @@
+import collections
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy import or_, update
+
+from app import db
+from app.models import Job
+from app.rate_limit import spotify_context, BACKGROUND
+from app.extensions import spotify_breaker
+from app.circuit import CircuitOpenError
+from app.scheduler import scheduler
+
+logger = logging.getLogger(__name__)
+
+#  How often deferred jobs check whether Spotify is reachable again
+DEFERRED_CHECK_INTERVAL = 15
+#  How often a process marks its unfinished jobs as still alive
+HEARTBEAT_INTERVAL = 30
+#  Unfinished jobs nobody has touched for this long belonged to a process that exited
+STALE_JOB_AFTER = timedelta(minutes=2)
+UNFINISHED = ("queued", "deferred", "running")
+
+_current = threading.local()
+
+
+def _update_job(job_id, **values):
+    """Write job state on its own connection so the job's ORM session is never committed early."""
+    values["updated_at"] = datetime.utcnow()
+    with db.engine.begin() as conn:
+        conn.execute(update(Job.__table__).where(Job.__table__.c.id == job_id).values(**values))
+
+
+class JobQueue:
+    """Local worker pool for long-running playlist generators with state persisted in the job table.
+
+    Jobs that would start while the Spotify circuit breaker is open are parked
+    as "deferred" and resubmitted once it lets calls through again. The
+    deferred list lives in this process only, so every process heartbeats its
+    unfinished jobs and fails the ones left behind by a process that exited
+    (their functions are not persisted, so they cannot be resumed).
+    """
+
+    def __init__(self):
+        self.app = None
+        self._executor = None
+        self._deferred = collections.deque()
+        self._active = set()  # Unfinished job ids owned by this process
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        self._executor = ThreadPoolExecutor(
+            max_workers=app.config.get("JOB_WORKERS", 4),
+            thread_name_prefix="job-worker"
+        )
+
+    def submit(self, kind, user_id, fn, *args, **kwargs):
+        """Persist a queued job and schedule fn(*args, **kwargs) on the pool.
+
+        fn must return a (body, status) tuple like the service functions do.
+        """
+        job = Job(id=uuid.uuid4().hex, user_id=user_id, kind=kind, status="queued", progress=0)
+        db.session.add(job)
+        db.session.commit()
+        with self._lock:
+            self._active.add(job.id)
+        self._executor.submit(self._run, job.id, user_id, fn, args, kwargs)
+        return job
+
+    def _defer(self, job_id, user_id, fn, args, kwargs):
+        with self.app.app_context():
+            _update_job(job_id, status="deferred")
+        with self._lock:
+            self._deferred.append((job_id, user_id, fn, args, kwargs))
+
+    def _run(self, job_id, user_id, fn, args, kwargs):
+        if spotify_breaker.is_open():
+            self._defer(job_id, user_id, fn, args, kwargs)
+            return
+
+        with self.app.app_context(), spotify_context(BACKGROUND, user_id):
+            _current.job_id = job_id
+            try:
+                _update_job(job_id, status="running")
+                body, status = fn(*args, **kwargs)
+                self._finish(
+                    job_id,
+                    status="succeeded" if status < 400 else "failed",
+                    progress=100 if status < 400 else Job.__table__.c.progress,
+                    result=body,
+                    result_status=status
+                )
+            except CircuitOpenError:
+                # The breaker opened again before the job reached Spotify, wait for the next recovery
+                db.session.rollback()
+                self._defer(job_id, user_id, fn, args, kwargs)
+            except Exception as e:
+                logger.error(f"Job {job_id} crashed: {str(e)}")
+                db.session.rollback()
+                self._finish(job_id, status="failed", error=str(e)[:500], result_status=500)
+            finally:
+                _current.job_id = None
+
+    def _finish(self, job_id, **values):
+        _update_job(job_id, **values)
+        with self._lock:
+            self._active.discard(job_id)
+
+    def resume_deferred(self):
+        """Resubmit deferred jobs unless the circuit breaker is still failing calls fast.
+
+        Until the breaker has closed again, only one job goes out (as its probe).
+        """
+        if spotify_breaker.is_open():
+            return 0
+        with self._lock:
+            count = len(self._deferred) if spotify_breaker.is_closed() else min(1, len(self._deferred))
+            ready = [self._deferred.popleft() for _ in range(count)]
+        for job_id, user_id, fn, args, kwargs in ready:
+            _update_job(job_id, status="queued")
+            self._executor.submit(self._run, job_id, user_id, fn, args, kwargs)
+        return len(ready)
+
+    def heartbeat(self):
+        """Mark this process's unfinished jobs alive and fail unfinished jobs nobody has touched lately."""
+        now = datetime.utcnow()
+        with self._lock:
+            active = list(self._active)
+        job = Job.__table__
+        with db.engine.begin() as conn:
+            if active:
+                conn.execute(update(job).where(job.c.id.in_(active)).values(updated_at=now))
+            result = conn.execute(
+                update(job)
+                .where(job.c.status.in_(UNFINISHED))
+                .where(or_(job.c.updated_at.is_(None), job.c.updated_at < now - STALE_JOB_AFTER))
+                .values(status="failed", error="Interrupted: the process running this job exited",
+                        result_status=500, updated_at=now)
+            )
+        return result.rowcount
+
+    def deferred_count(self):
+        with self._lock:
+            return len(self._deferred)
+
+
+def report_progress(percent):
+    """Record progress for the job running on this thread (no-op outside a job)."""
+    job_id = getattr(_current, "job_id", None)
+    if job_id:
+        _update_job(job_id, progress=int(percent))
+
+
+job_queue = JobQueue()
+
+
+@scheduler.every(HEARTBEAT_INTERVAL)
+def reap_stale_jobs():
+    failed = job_queue.heartbeat()
+    if failed:
+        logger.warning(f"Failed {failed} jobs left unfinished by an exited process")
+
+
+@scheduler.every(DEFERRED_CHECK_INTERVAL)
+def resume_deferred_jobs():
+    resumed = job_queue.resume_deferred()
+    if resumed:
+        logger.info(f"Resumed {resumed} jobs deferred during a Spotify outage")
@@ -0,0 +1,117 @@
+import itertools
+
+from app.concurrency import run_async
+from app.spotify_ids import id_to_int
+
+#  How merged playlists order their tracks
+STRATEGIES = ("concatenate", "interleave", "rating")
+#  Ratings at or above this go to the top of a rating merge, lower ones to the bottom
+LIKED_RATING = 3
+#  Spotify accepts at most 100 URIs per add call
+ADD_BATCH_SIZE = 100
+
+
+def _track_ids(pages):
+    for items in pages:
+        for item in items:
+            track = item.get("track")
+            if track and track.get("id"):  # Local files and removed tracks have no ID
+                yield track["id"]
+
+
+def _round_robin(streams):
+    active = list(streams)
+    while active:
+        for stream in list(active):
+            try:
+                yield next(stream)
+            except StopIteration:
+                active.remove(stream)
+
+
+def merge_track_ids(sources, strategy):
+    """Yield the unique track IDs of several page streams, first occurrence wins.
+
+    "interleave" takes one track from each source in turn. Every other
+    strategy reads the sources one after another. Seen IDs are kept as
+    128-bit integers rather than 22-character strings.
+    """
+    streams = [_track_ids(pages) for pages in sources]
+    ordered = _round_robin(streams) if strategy == "interleave" else itertools.chain(*streams)
+    seen = set()
+    for track_id in ordered:
+        key = id_to_int(track_id)
+        if key not in seen:
+            seen.add(key)
+            yield track_id
+
+
+class PlaylistWriter:
+    """Append URIs to a Spotify playlist in 100-URI batches while the caller keeps reading.
+
+    Each full batch is sent in the background. The next batch waits for the
+    previous one so Spotify receives them in order.
+    """
+
+    def __init__(self, client, playlist_id):
+        self.client = client
+        self.playlist_id = playlist_id
+        self.written = 0
+        self._batch = []
+        self._in_flight = None
+
+    def add(self, uri):
+        self._batch.append(uri)
+        if len(self._batch) >= ADD_BATCH_SIZE:
+            self._send()
+
+    def _send(self):
+        batch, self._batch = self._batch, []
+        self._wait()
+        self._in_flight = run_async(lambda: self.client.playlist_add_items(self.playlist_id, batch))
+        self.written += len(batch)
+
+    def _wait(self):
+        if self._in_flight is not None:
+            self._in_flight.result()  # Re-raises a failed add
+            self._in_flight = None
+
+    def insert_at_start(self, uris):
+        """Insert uris, in order, before everything written so far. Call after flush()."""
+        for i in range(0, len(uris), ADD_BATCH_SIZE):
+            self.client.playlist_add_items(self.playlist_id, uris[i:i + ADD_BATCH_SIZE], position=i)
+        self.written += len(uris)
+
+    def flush(self):
+        if self._batch:
+            self._send()
+        self._wait()
+
+
+def write_merge(writer, track_ids, strategy, ratings=None, on_track=None):
+    """Stream merged track IDs into writer and return the number of tracks written.
+
+    With the "rating" strategy, tracks the user rated are held back. They are
+    not streamed in source order. Liked tracks are inserted at the top, best
+    rating first, and disliked tracks go to the end. The held lists grow with
+    the user's ratings, not with the size of the playlists.
+    """
+    ratings = (ratings or {}) if strategy == "rating" else {}
+    liked, disliked = [], []
+    for track_id in track_ids:
+        if on_track:
+            on_track()
+        rating = ratings.get(track_id)
+        if rating is None:
+            writer.add(f"spotify:track:{track_id}")
+        elif rating >= LIKED_RATING:
+            liked.append((rating, track_id))
+        else:
+            disliked.append((rating, track_id))
+
+    for rating, track_id in sorted(disliked, key=lambda pair: -pair[0]):
+        writer.add(f"spotify:track:{track_id}")
+    writer.flush()
+    liked.sort(key=lambda pair: -pair[0])  # Stable, so equal ratings keep source order
+    writer.insert_at_start([f"spotify:track:{track_id}" for _, track_id in liked])
+    return writer.written
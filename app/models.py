@@ -1,5 +1,7 @@
 from app import db
 from datetime import datetime
+from sqlalchemy.orm import validates
+from app.spotify_ids import SpotifyID
 
 class User(db.Model):
     __tablename__ = "user"
@@ -11,10 +13,24 @@ class User(db.Model):
     # ✅ One-to-Many Relationship (User → Playlists)
     playlists = db.relationship('Playlist', backref='user', lazy=True, cascade="all, delete-orphan")
 
+class SpotifyToken(db.Model):
+    __tablename__ = "spotify_token"
+    user_id = db.Column(
+        db.Integer,
+        db.ForeignKey('user.id', ondelete="CASCADE", name="fk_spotify_token_user"),
+        primary_key=True
+    )
+    access_token = db.Column(db.String(512), nullable=False)
+    refresh_token = db.Column(db.String(512), nullable=False)
+    expires_at = db.Column(db.Integer, nullable=False)  # Unix timestamp
+    scope = db.Column(db.String(500))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
 class Playlist(db.Model):
     __tablename__ = "playlist"
     __table_args__ = (
         db.UniqueConstraint('user_id', 'name', name='unique_playlist_per_user'),
+        db.Index('ix_playlist_user_id_id', 'user_id', 'id'),  # Keyset pagination per user
     )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(
@@ -26,17 +42,36 @@ class Playlist(db.Model):
     description = db.Column(db.String(500))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     spotify_id = db.Column(db.String(100), nullable=True)  #  Store Spotify Playlist ID
+    snapshot_id = db.Column(db.String(100), nullable=True)  #  Spotify snapshot at last sync
     #  One-to-Many Relationship (Playlist → Tracks)
     tracks = db.relationship('Track', backref='playlist', lazy=True, cascade="all, delete-orphan")
 
 
+class CatalogTrack(db.Model):
+    """Spotify track metadata stored once and shared by every playlist that contains the track."""
+    __tablename__ = "catalog_track"
+    spotify_track_id = db.Column(SpotifyID, primary_key=True)
+    name = db.Column(db.String(200), nullable=False)
+    artist = db.Column(db.String(200))
+    album = db.Column(db.String(200))
+    album_id = db.Column(db.String(100))
+    release_date = db.Column(db.String(20))  # Spotify precision varies: YYYY, YYYY-MM or YYYY-MM-DD
+    popularity = db.Column(db.Integer)
+    duration_ms = db.Column(db.Integer)
+    genres = db.Column(db.String(500))  # Comma-separated genres of the primary artist
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
+
+
 class Track(db.Model):
     __tablename__ = "track"
     __table_args__ = (
         db.UniqueConstraint('playlist_id', 'name', name='unique_track_per_playlist'),
+        db.Index('ix_track_playlist_id_id', 'playlist_id', 'id'),  # Keyset pagination per playlist
+        db.Index('ix_track_playlist_id_name_lower', 'playlist_id', 'name_lower'),  # Case-insensitive name lookups
     )
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(200), nullable=False)
+    name_lower = db.Column(db.String(200), nullable=False)  # Kept in sync with name by normalize_name
     artist = db.Column(db.String(200), nullable=False)
     album = db.Column(db.String(200))
     playlist_id = db.Column(
@@ -44,30 +79,49 @@ class Track(db.Model):
         db.ForeignKey('playlist.id', ondelete="CASCADE", name="fk_track_playlist"),  # Added constraint name
         nullable=False
     )
-    spotify_track_id = db.Column(db.String(200), nullable=False)  # Add this new field
-    # Add unique constraint
-    __table_args__ = (
-        db.UniqueConstraint('playlist_id', 'name', name='unique_track_per_playlist'),
-    )
+    spotify_track_id = db.Column(
+        SpotifyID,
+        db.ForeignKey('catalog_track.spotify_track_id', name="fk_track_catalog"),
+        nullable=False
+    )  # Add this new field
+    synced = db.Column(db.Boolean, nullable=False, default=False)  # Present on Spotify as of last sync
+
+    #  Shared Spotify metadata for this track (release date, popularity, duration)
+    catalog = db.relationship('CatalogTrack', lazy=True)
+
+    @validates('name')
+    def normalize_name(self, key, name):
+        self.name_lower = name.lower() if name is not None else None
+        return name
 # Add to models.py
 class Favorite(db.Model):
     __tablename__ = "favorite"
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'spotify_id', name='unique_favorite_per_user'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete="CASCADE"), nullable=False)
-    spotify_id = db.Column(db.String(200), nullable=False)
+    spotify_id = db.Column(SpotifyID, nullable=False)
     type = db.Column(db.String(50), nullable=False)  # 'track' or 'album'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class UserRating(db.Model):
     __tablename__ = "user_rating"
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'spotify_track_id', name='unique_rating_per_user_track'),
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete="CASCADE"), nullable=False)
-    spotify_track_id = db.Column(db.String(200), nullable=False)
+    spotify_track_id = db.Column(SpotifyID, nullable=False)
     rating = db.Column(db.Integer, nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 class TrackComment(db.Model):
     __tablename__ = "track_comment"
+    __table_args__ = (
+        db.Index('ix_track_comment_track_id_id', 'track_id', 'id'),  # Keyset pagination per track
+        db.Index('ix_track_comment_user_id_id', 'user_id', 'id'),  # Keyset pagination per user
+    )
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(
         db.Integer,
@@ -87,6 +141,28 @@ class TrackComment(db.Model):
     track = db.relationship('Track', backref=db.backref('comments', cascade='all, delete-orphan'))
 
 
+class TrackPool(db.Model):
+    """Precomputed candidate tracks for one (year, market), refreshed in the background."""
+    __tablename__ = "track_pool"
+    __table_args__ = (
+        db.UniqueConstraint('year', 'market', name='unique_track_pool_year_market'),
+    )
+    id = db.Column(db.Integer, primary_key=True)
+    year = db.Column(db.Integer, nullable=False)
+    market = db.Column(db.String(2), nullable=False)  # ISO 3166-1 alpha-2
+    track_ids = db.Column(db.JSON, nullable=False)  # Spotify IDs in search relevance order
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
 
 
-
+class Job(db.Model):
+    __tablename__ = "job"
+    id = db.Column(db.String(32), primary_key=True)  # uuid4 hex
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete="CASCADE"), nullable=False)
+    kind = db.Column(db.String(50), nullable=False)  # e.g. 'time_capsule', 'merge'
+    status = db.Column(db.String(20), nullable=False, default="queued")  # queued, deferred, running, succeeded, failed
+    progress = db.Column(db.Integer, nullable=False, default=0)  # Percent complete
+    result = db.Column(db.JSON)
+    result_status = db.Column(db.Integer)  # HTTP status the generator returned
+    error = db.Column(db.String(500))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
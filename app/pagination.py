@@ -0,0 +1,54 @@
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 100
+
+
+class PaginationError(ValueError):
+    """Raised for an unparseable cursor or limit."""
+
+
+def encode_cursor(last_id):
+    return base64.urlsafe_b64encode(json.dumps({"id": last_id}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded.encode()))["id"])
+    except Exception:
+        raise PaginationError("Invalid cursor")
+
+
+def parse_limit(limit):
+    if limit in (None, ""):
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(limit)
+    except (TypeError, ValueError):
+        raise PaginationError("Invalid limit value")
+    if not (1 <= limit <= MAX_PAGE_SIZE):
+        raise PaginationError(f"Limit must be 1-{MAX_PAGE_SIZE}")
+    return limit
+
+
+def paginate(query, id_column, cursor=None, limit=None, newest_first=False):
+    """Keyset-paginate query on id_column.
+
+    Returns (rows, next_cursor). The cursor is an opaque token for the last
+    row's id, so each page is an index range scan rather than an OFFSET.
+    """
+    limit = parse_limit(limit)
+    if cursor:
+        last_id = decode_cursor(cursor)
+        query = query.filter(id_column < last_id if newest_first else id_column > last_id)
+
+    query = query.order_by(id_column.desc() if newest_first else id_column.asc())
+    rows = query.limit(limit + 1).all()  # One extra row tells us whether another page exists
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].id)
+    return rows, next_cursor
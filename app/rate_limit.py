@@ -0,0 +1,340 @@
+import contextvars
+import heapq
+import itertools
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from flask_jwt_extended import verify_jwt_in_request, get_jwt_identity
+from spotipy.exceptions import SpotifyException
+
+logger = logging.getLogger(__name__)
+
+#  Priority classes; lower runs first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+_priority = contextvars.ContextVar("spotify_priority", default=INTERACTIVE)
+_user = contextvars.ContextVar("spotify_user", default=None)
+
+#  Only requests to the Web API count against the quota (token refreshes do not)
+API_PREFIX = "https://api.spotify.com/"
+
+#  KEYS: bucket, pause. ARGV: rate, burst, reserve. Returns seconds to wait, "0" when a token was taken.
+_TAKE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate, burst, reserve = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+local paused = tonumber(redis.call('GET', KEYS[2]) or '0')
+if paused > now then return tostring(paused - now) end
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 + reserve then tokens = tokens - 1 else wait = (1 + reserve - tokens) / rate end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+#  KEYS: pause. ARGV: seconds. Extends (never shortens) the shared pause.
+_PAUSE_SCRIPT = """
+local t = redis.call('TIME')
+local untl = tonumber(t[1]) + tonumber(t[2]) / 1000000 + tonumber(ARGV[1])
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+if untl > current then redis.call('SET', KEYS[1], tostring(untl), 'PX', math.ceil(tonumber(ARGV[1]) * 1000)) end
+return 1
+"""
+
+
+@contextmanager
+def spotify_context(priority=None, user_id=None):
+    """Tag outbound Spotify calls made in this context with a priority class and user."""
+    tokens = []
+    if priority is not None:
+        tokens.append((_priority, _priority.set(priority)))
+    if user_id is not None:
+        tokens.append((_user, _user.set(user_id)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def set_request_user(user_id):
+    """Attribute this request's Spotify calls to user_id (None for anonymous requests)."""
+    _priority.set(INTERACTIVE)
+    _user.set(user_id)
+
+
+class RateScheduler:
+    """Token bucket shared by every worker process through Redis, with an in-process fallback.
+
+    - A 429's Retry-After pauses all callers everywhere until it expires.
+    - Background work may not take the last `reserve` tokens, so interactive
+      requests keep headroom across processes.
+    - Inside a process, waiters are served by priority, then by how many
+      calls their user already has in line (round robin), then first come.
+    """
+
+    def __init__(self, rate, burst, reserve=0.25, redis_client=None, name="spotify-rate", max_wait=30):
+        self.rate = rate
+        self.burst = burst
+        self.reserve_tokens = burst * reserve
+        self.redis = redis_client
+        self.max_wait = max_wait
+        self._keys = (f"{name}:bucket", f"{name}:pause")
+        self._take_script = redis_client.register_script(_TAKE_SCRIPT) if redis_client else None
+        self._pause_script = redis_client.register_script(_PAUSE_SCRIPT) if redis_client else None
+
+        self._tokens = float(burst)
+        self._refilled_at = time.monotonic()
+        self._paused_until = 0.0
+        self._waiting = []  # heap of (priority, user's turn, seq)
+        self._turns = {}  # user -> calls queued since the line was last empty
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self.granted = 0
+        self.waited = 0
+        self.pauses = 0
+        self.timeouts = 0
+
+    def init_app(self, app):
+        """Attribute each request's Spotify calls to its JWT user, as interactive work."""
+        @app.before_request
+        def tag_spotify_calls():
+            user_id = None
+            try:
+                if verify_jwt_in_request(optional=True):
+                    identity = get_jwt_identity()
+                    user_id = identity.get("id") if isinstance(identity, dict) else identity
+            except Exception:
+                pass  # Protected routes report bad tokens themselves
+            set_request_user(user_id)
+
+    def _take_local(self, reserve):
+        now = time.monotonic()
+        if self._paused_until > now:
+            return self._paused_until - now
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate)
+        self._refilled_at = now
+        if self._tokens >= 1 + reserve:
+            self._tokens -= 1
+            return 0.0
+        return (1 + reserve - self._tokens) / self.rate
+
+    def _take(self, priority):
+        reserve = self.reserve_tokens if priority == BACKGROUND else 0
+        if self.redis is not None:
+            try:
+                return float(self._take_script(keys=self._keys, args=[self.rate, self.burst, reserve]))
+            except Exception as e:
+                logger.warning(f"Redis rate limiter unavailable, limiting this process only: {str(e)}")
+                self.redis = None
+        return self._take_local(reserve)
+
+    def acquire(self):
+        """Block until this caller may send one request; raise a 429 SpotifyException after max_wait."""
+        priority, user = _priority.get(), _user.get()
+        deadline = time.monotonic() + self.max_wait
+        with self._cond:
+            turn = self._turns.get(user, 0)
+            self._turns[user] = turn + 1
+            entry = (priority, turn, next(self._seq))
+            heapq.heappush(self._waiting, entry)
+            self._cond.notify_all()  # A more urgent waiter may now be first
+            try:
+                while True:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self.timeouts += 1
+                        raise SpotifyException(429, -1, "Timed out waiting for the Spotify rate limiter")
+                    if self._waiting[0] is not entry:
+                        self._cond.wait(remaining)
+                        continue
+                    wait = self._take(priority)
+                    if wait <= 0:
+                        self.granted += 1
+                        return
+                    self.waited += 1
+                    self._cond.wait(min(wait, remaining))
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                if not self._waiting:
+                    self._turns.clear()  # Fairness only matters among concurrent waiters
+                self._cond.notify_all()
+
+    def pause(self, seconds):
+        """Stop every caller (in all processes when Redis is up) for seconds."""
+        with self._cond:
+            self.pauses += 1
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        if self.redis is not None:
+            try:
+                self._pause_script(keys=self._keys[1:], args=[seconds])
+            except Exception as e:
+                logger.warning(f"Could not share Spotify pause through Redis: {str(e)}")
+        logger.warning(f"Spotify rate limited, pausing outbound calls for {seconds}s")
+
+    def stats(self):
+        with self._cond:
+            return {
+                "backend": "redis" if self.redis is not None else "local",
+                "rate_per_second": self.rate,
+                "burst": self.burst,
+                "granted": self.granted,
+                "waited": self.waited,
+                "pauses": self.pauses,
+                "timeouts": self.timeouts,
+                "waiting": len(self._waiting),
+                "paused_for": round(max(0.0, self._paused_until - time.monotonic()), 2)
+            }
+
+
+class AdaptiveLimiter:
+    """AIMD cap on in-flight Spotify requests, driven by latency and errors.
+
+    A healthy response raises the limit by 1/limit, which adds about one slot
+    per round trip. A 429, 5xx, timeout or connection error, or a response
+    much slower than the baseline latency, multiplies the limit by `backoff`.
+    That happens at most once per cooldown, so one burst of slow replies
+    counts as one signal. The baseline is the fastest recent latency and
+    drifts up slowly, so a lasting change in Spotify's speed is absorbed.
+    """
+
+    def __init__(self, initial=8, min_limit=1, max_limit=64, backoff=0.7, latency_tolerance=3.0,
+                 min_slow_latency=0.5, cooldown=1.0, max_wait=30):
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.min_slow_latency = min_slow_latency
+        self.cooldown = cooldown
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.baseline = None
+        self.smoothed = None
+        self._decreased_at = 0.0
+        self._cond = threading.Condition()
+        self.increases = 0
+        self.decreases = 0
+        self.rejected = 0
+
+    def acquire(self):
+        """Block until a slot is free; raise a 503 SpotifyException after max_wait."""
+        deadline = time.monotonic() + self.max_wait
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.rejected += 1
+                    raise SpotifyException(503, -1, "Timed out waiting for a Spotify request slot")
+                self._cond.wait(remaining)
+            self.in_flight += 1
+
+    def release(self, latency, overloaded):
+        with self._cond:
+            self.in_flight -= 1
+            if self.baseline is None or latency < self.baseline:
+                self.baseline = latency
+            else:
+                self.baseline += (latency - self.baseline) * 0.001
+            self.smoothed = latency if self.smoothed is None else self.smoothed * 0.9 + latency * 0.1
+
+            slow = latency > self.min_slow_latency and latency > self.baseline * self.latency_tolerance
+            now = time.monotonic()
+            if overloaded or slow:
+                if now - self._decreased_at >= self.cooldown:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self._decreased_at = now
+                    self.decreases += 1
+            elif self.limit < self.max_limit:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                self.increases += 1
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "baseline_latency_ms": round(self.baseline * 1000) if self.baseline is not None else None,
+                "smoothed_latency_ms": round(self.smoothed * 1000) if self.smoothed is not None else None,
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "rejected": self.rejected
+            }
+
+
+def retry_after_seconds(response, default=1.0):
+    try:
+        return max(float(response.headers.get("Retry-After", default)), 0.0)
+    except (TypeError, ValueError):
+        return default
+
+
+class ScheduledSession(requests.Session):
+    """requests.Session that bounds in-flight calls and rate-schedules Web API calls.
+
+    A circuit breaker, when given, sees every request first. While it is open,
+    calls fail fast with CircuitOpenError instead of waiting out timeouts and
+    retries. Every request (token refreshes included) takes a slot from the
+    adaptive concurrency limiter. Web API requests also take a rate token, and
+    a 429 becomes a global pause. urllib3 keeps retrying connection errors and
+    5xx but never 429s. A 429 is retried only here, once the shared pause
+    ends, so retries from all workers do not line up.
+    """
+
+    def __init__(self, scheduler, limiter, breaker=None, max_rate_limit_retries=3):
+        super().__init__()
+        self.scheduler = scheduler
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_rate_limit_retries = max_rate_limit_retries
+
+    def _send_limited(self, method, url, scheduled, *args, **kwargs):
+        if scheduled:
+            self.scheduler.acquire()  # Before the slot, so threads waiting on the token bucket hold no slots
+        self.limiter.acquire()
+        started = time.monotonic()
+        overloaded = True
+        try:
+            response = super().request(method, url, *args, **kwargs)
+            overloaded = response.status_code == 429 or response.status_code >= 500
+            return response
+        finally:
+            self.limiter.release(time.monotonic() - started, overloaded)
+
+    def request(self, method, url, *args, **kwargs):
+        if self.breaker is None:
+            return self._send(method, url, *args, **kwargs)
+
+        self.breaker.before_call()
+        failed = False  # Waiting on our own limiters is not a Spotify failure
+        try:
+            response = self._send(method, url, *args, **kwargs)
+            failed = response.status_code >= 500
+            return response
+        except requests.RequestException:
+            failed = True
+            raise
+        finally:
+            self.breaker.record(failed)
+
+    def _send(self, method, url, *args, **kwargs):
+        if not str(url).startswith(API_PREFIX):
+            return self._send_limited(method, url, False, *args, **kwargs)
+
+        for attempt in range(self.max_rate_limit_retries + 1):
+            #  Every attempt, retries included, waits for the shared pause and takes its own token
+            response = self._send_limited(method, url, True, *args, **kwargs)
+            if response.status_code != 429 or attempt == self.max_rate_limit_retries:
+                return response
+            self.scheduler.pause(retry_after_seconds(response))
+            response.close()
@@ -0,0 +1,292 @@
+import gzip
+import json
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime
+from heapq import nlargest
+
+import click
+from flask.cli import AppGroup
+
+from app.models import UserRating
+from app.spotify_ids import id_to_int, int_to_id
+
+logger = logging.getLogger(__name__)
+
+#  Ratings run 1-5; above NEUTRAL_RATING counts as a like, below it as a dislike
+MIN_RATING = 1
+MAX_RATING = 5
+NEUTRAL_RATING = 3
+#  Most similar tracks kept per track
+NEIGHBORS = 50
+#  Ratings per user that count toward similarities (co-occurrence work grows with its square)
+MAX_ITEMS_PER_USER = 200
+#  How often a process picks up ratings written by other processes
+CATCH_UP_INTERVAL = 60
+
+
+def rating_weight(rating):
+    """Weight for a stored rating (clamped to 1-5), or None when it is not a number."""
+    try:
+        rating = int(rating)
+    except (TypeError, ValueError):
+        return None
+    return min(max(rating, MIN_RATING), MAX_RATING) - NEUTRAL_RATING
+
+
+class ItemSimilarity:
+    """Item-item cosine similarity over the sparse user-by-track rating matrix.
+
+    Each rating is stored as a weight (rating - NEUTRAL_RATING) so dislikes
+    push recommendations away. Tracks are keyed by their 128-bit integer form.
+    The model keeps the sparse dot products between co-rated tracks and each
+    track's squared norm, so a new or changed rating only touches the tracks
+    that the same user rated. Only a user's first `max_items_per_user` liked
+    or disliked tracks count toward similarities, which bounds that work per
+    user; later ratings still seed and filter the user's own recommendations.
+    Neighbor lists are precomputed and refreshed lazily for the tracks a
+    rating touched. Snapshots are gzipped JSON.
+    """
+
+    def __init__(self, neighbors=NEIGHBORS, max_items_per_user=MAX_ITEMS_PER_USER):
+        self.neighbors = neighbors
+        self.max_items_per_user = max_items_per_user
+        self.user_items = {}  # user_id -> {track: weight}, in rating order
+        self.counted = {}  # user_id -> tracks counted toward similarities
+        self.dots = {}  # track -> {other track: sum of weight products}
+        self.norms = {}  # track -> sum of squared weights
+        self.top = {}  # track -> [(similarity, other track)], best first
+        self.dirty = set()
+        self.last_rating_id = 0
+        self.built_at = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_ratings(cls, neighbors=NEIGHBORS, max_items_per_user=MAX_ITEMS_PER_USER):
+        """Build the full model from the user_rating table."""
+        model = cls(neighbors, max_items_per_user)
+        for rating in UserRating.query.order_by(UserRating.id).yield_per(1000):
+            model.last_rating_id = rating.id
+            weight = rating_weight(rating.rating)
+            if weight is None:
+                logger.warning(f"Skipping rating {rating.id} with invalid value {rating.rating!r}")
+                continue
+            items = model.user_items.setdefault(rating.user_id, {})
+            items[id_to_int(rating.spotify_track_id)] = weight
+
+        for user_id, items in model.user_items.items():
+            rated = [(item, weight) for item, weight in items.items() if weight][:max_items_per_user]
+            model.counted[user_id] = {item for item, _ in rated}
+            for i, (item, weight) in enumerate(rated):
+                model.norms[item] = model.norms.get(item, 0) + weight * weight
+                for other, other_weight in rated[i + 1:]:
+                    model._add_dot(item, other, weight * other_weight)
+
+        model.top = {item: model._compute_neighbors(item) for item in model.dots}
+        model.built_at = datetime.utcnow()
+        return model
+
+    def _add_dot(self, item, other, value):
+        row = self.dots.setdefault(item, {})
+        row[other] = row.get(other, 0) + value
+        row = self.dots.setdefault(other, {})
+        row[item] = row.get(item, 0) + value
+
+    def _compute_neighbors(self, item):
+        norm = self.norms.get(item, 0)
+        if not norm:
+            return []
+        similar = (
+            (dot / math.sqrt(norm * self.norms[other]), other)
+            for other, dot in self.dots.get(item, {}).items()
+            if dot > 0 and self.norms.get(other)
+        )
+        return nlargest(self.neighbors, similar)
+
+    def _neighbors(self, item):
+        if item in self.dirty:
+            self.top[item] = self._compute_neighbors(item)
+            self.dirty.discard(item)
+        return self.top.get(item, [])
+
+    def rate(self, user_id, spotify_id, rating):
+        """Apply one new or changed rating. Applying the same rating twice is a no-op; invalid ratings are ignored."""
+        weight = rating_weight(rating)
+        if weight is None:
+            return
+        item = id_to_int(spotify_id)
+        with self._lock:
+            items = self.user_items.setdefault(user_id, {})
+            counted = self.counted.setdefault(user_id, set())
+            old = items.get(item, 0)
+            items[item] = weight
+            if item not in counted:
+                if not weight or len(counted) >= self.max_items_per_user:
+                    return  # Kept for this user's own recommendations only
+                counted.add(item)
+                old = 0
+            delta = weight - old
+            if not delta:
+                return
+
+            for other in counted:
+                other_weight = items[other]
+                if other != item and other_weight:
+                    self._add_dot(item, other, delta * other_weight)
+            self.norms[item] = self.norms.get(item, 0) + weight * weight - old * old
+
+            # The norm change moves every similarity involving this track
+            self.dirty.add(item)
+            self.dirty.update(self.dots.get(item, ()))
+
+    def recommend(self, user_id, limit):
+        """Return up to limit (spotify_track_id, score) pairs the user has not rated yet."""
+        with self._lock:
+            rated = self.user_items.get(user_id) or {}
+            scores = {}
+            for item, weight in rated.items():
+                if not weight:
+                    continue
+                for similarity, other in self._neighbors(item):
+                    if other not in rated:
+                        scores[other] = scores.get(other, 0) + similarity * weight
+        best = nlargest(limit, ((score, item) for item, score in scores.items() if score > 0))
+        return [(int_to_id(item), round(score, 4)) for score, item in best]
+
+    def catch_up(self):
+        """Apply ratings inserted since the model was built or last caught up.
+
+        This also covers ratings written by other processes. A changed rating
+        is applied by the process that wrote it and by the next full build.
+        """
+        new_ratings = (UserRating.query
+                       .filter(UserRating.id > self.last_rating_id)
+                       .order_by(UserRating.id)
+                       .all())
+        for rating in new_ratings:
+            self.rate(rating.user_id, rating.spotify_track_id, rating.rating)
+            self.last_rating_id = rating.id
+        return len(new_ratings)
+
+    def dumps(self):
+        """Serialize the model as gzipped JSON; tracks are listed once and referenced by position."""
+        with self._lock:
+            tracks = sorted(self.norms.keys() | {item for items in self.user_items.values() for item in items})
+            position = {item: i for i, item in enumerate(tracks)}
+            payload = {
+                "version": 1,
+                "neighbors": self.neighbors,
+                "max_items_per_user": self.max_items_per_user,
+                "last_rating_id": self.last_rating_id,
+                "built_at": self.built_at.isoformat() if self.built_at else None,
+                "tracks": [int_to_id(item) for item in tracks],
+                "users": {
+                    str(user_id): [[position[item], weight, int(item in self.counted.get(user_id, ()))]
+                                   for item, weight in items.items()]
+                    for user_id, items in self.user_items.items()
+                },
+                "norms": [self.norms.get(item, 0) for item in tracks],
+                "dots": {
+                    str(position[item]): [value for other, dot in row.items() for value in (position[other], dot)]
+                    for item, row in self.dots.items()
+                },
+                "top": {
+                    str(position[item]): [value for similarity, other in top for value in (position[other], similarity)]
+                    for item, top in self.top.items() if item not in self.dirty
+                },
+                "dirty": [position[item] for item in self.dirty if item in position]
+            }
+        return gzip.compress(json.dumps(payload, separators=(",", ":")).encode())
+
+    @classmethod
+    def loads(cls, data):
+        payload = json.loads(gzip.decompress(data))
+        model = cls(payload["neighbors"], payload["max_items_per_user"])
+        tracks = [id_to_int(spotify_id) for spotify_id in payload["tracks"]]
+        for user_id, entries in payload["users"].items():
+            model.user_items[int(user_id)] = {tracks[i]: weight for i, weight, _ in entries}
+            model.counted[int(user_id)] = {tracks[i] for i, _, counted in entries if counted}
+        model.norms = {item: norm for item, norm in zip(tracks, payload["norms"]) if norm}
+        for i, values in payload["dots"].items():
+            model.dots[tracks[int(i)]] = {tracks[values[j]]: values[j + 1] for j in range(0, len(values), 2)}
+        for i, values in payload["top"].items():
+            model.top[tracks[int(i)]] = [(values[j + 1], tracks[values[j]]) for j in range(0, len(values), 2)]
+        model.dirty = {tracks[i] for i in payload["dirty"]} | (model.dots.keys() - model.top.keys())
+        model.last_rating_id = payload["last_rating_id"]
+        model.built_at = datetime.fromisoformat(payload["built_at"]) if payload["built_at"] else None
+        return model
+
+    def save(self, path):
+        payload = self.dumps()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)  # Readers never see a half-written snapshot
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.loads(f.read())
+
+
+class Recommender:
+    """Process-wide model holder: loads the offline snapshot once, then keeps it current."""
+
+    def __init__(self):
+        self.model = None
+        self.snapshot_path = None
+        self._last_catch_up = 0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.snapshot_path = app.config.get("RECOMMENDER_SNAPSHOT") or \
+            os.path.join(app.instance_path, "recommender.json.gz")
+        app.cli.add_command(recommender_cli)
+
+    def get(self):
+        with self._lock:
+            if self.model is None:
+                self.model = self._load_snapshot() or ItemSimilarity.from_ratings()
+                self._last_catch_up = 0
+            if time.monotonic() - self._last_catch_up > CATCH_UP_INTERVAL:
+                self.model.catch_up()
+                self._last_catch_up = time.monotonic()
+            return self.model
+
+    def _load_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            return ItemSimilarity.load(self.snapshot_path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable recommender snapshot: {str(e)}")
+            return None
+
+    def recommend(self, user_id, limit):
+        return self.get().recommend(user_id, limit)
+
+    def record_rating(self, user_id, spotify_id, rating):
+        """Feed a committed rating into the in-memory model (never raises)."""
+        if self.model is None:
+            return  # The first load reads it from the database
+        try:
+            self.model.rate(user_id, spotify_id, int(rating))
+        except Exception as e:
+            logger.warning(f"Recommender update failed: {str(e)}")
+
+
+recommender = Recommender()
+
+recommender_cli = AppGroup("recommender", help="Item-item recommendation model.")
+
+
+@recommender_cli.command("build")
+def build_command():
+    """Rebuild the similarity model from all ratings and write the snapshot."""
+    model = ItemSimilarity.from_ratings()
+    model.save(recommender.snapshot_path)
+    click.echo(f"Built model for {len(model.user_items)} users and {len(model.norms)} tracks "
+               f"-> {recommender.snapshot_path}")
@@ -0,0 +1,115 @@
+import logging
+from bisect import bisect_left
+
+from app.spotify_paging import fetch_playlist_items
+
+logger = logging.getLogger(__name__)
+
+#  Attempts to read a playlist whose snapshot does not change mid-read
+READ_ATTEMPTS = 3
+
+
+class ReorderError(ValueError):
+    """Raised when the target order is not a permutation of the playlist's current tracks."""
+
+
+def _stable_positions(sequence):
+    """Return the indexes of one longest increasing subsequence of sequence (O(n log n))."""
+    tails = []  # tails[k] = index of the smallest tail of an increasing run of length k + 1
+    tail_values = []
+    previous = [-1] * len(sequence)
+    for i, value in enumerate(sequence):
+        k = bisect_left(tail_values, value)
+        if k:
+            previous[i] = tails[k - 1]
+        if k == len(tails):
+            tails.append(i)
+            tail_values.append(value)
+        else:
+            tails[k] = i
+            tail_values[k] = value
+
+    stable = set()
+    i = tails[-1] if tails else -1
+    while i != -1:
+        stable.add(i)
+        i = previous[i]
+    return stable
+
+
+def plan_moves(current, target):
+    """Return the (range_start, range_length, insert_before) moves that turn current into target.
+
+    Both are lists of track IDs and may contain duplicates, which are matched
+    in order of appearance. Tracks on a longest increasing subsequence of
+    current positions stay where they are. Every other track is placed right
+    after its predecessor in the target order. Runs of such tracks that are
+    already adjacent move together as one range. The number of moves is
+    bounded by the number of tracks out of place, not by the playlist size.
+    """
+    if len(current) != len(target):
+        raise ReorderError("Target order must contain exactly the playlist's current tracks")
+
+    # Give every occurrence a stable key: its index in the current order
+    occurrences = {}
+    for index, track_id in enumerate(current):
+        occurrences.setdefault(track_id, []).append(index)
+    for indexes in occurrences.values():
+        indexes.reverse()  # pop() then hands them out in order
+    try:
+        target_keys = [occurrences[track_id].pop() for track_id in target]
+    except (KeyError, IndexError):
+        raise ReorderError("Target order must contain exactly the playlist's current tracks")
+
+    stable = _stable_positions(target_keys)
+    order = list(range(len(current)))  # Simulated playlist, as current-order keys
+    moves = []
+    j = 0
+    while j < len(target_keys):
+        if j in stable:
+            j += 1
+            continue
+
+        # Extend the run while the next mover already follows this one in the playlist
+        start = order.index(target_keys[j])
+        length = 1
+        while (j + length < len(target_keys) and j + length not in stable
+               and start + length < len(order) and order[start + length] == target_keys[j + length]):
+            length += 1
+
+        insert_before = order.index(target_keys[j - 1]) + 1 if j else 0
+        if not start <= insert_before <= start + length:  # Otherwise it is already in place
+            moves.append((start, length, insert_before))
+            segment = order[start:start + length]
+            del order[start:start + length]
+            position = insert_before - length if insert_before > start else insert_before
+            order[position:position] = segment
+        j += length
+    return moves
+
+
+def read_order(client, playlist):
+    """Return (snapshot_id, track IDs) read consistently, or raise ReorderError if the playlist keeps changing."""
+    for _ in range(READ_ATTEMPTS):
+        snapshot_id = client.playlist(playlist.spotify_id, fields="snapshot_id")["snapshot_id"]
+        items = fetch_playlist_items(client, playlist.spotify_id, item_fields="track(id)")
+        if client.playlist(playlist.spotify_id, fields="snapshot_id")["snapshot_id"] == snapshot_id:
+            track_ids = [(item.get("track") or {}).get("id") for item in items]
+            if not all(track_ids):
+                raise ReorderError("Playlists with local files or unavailable items cannot be reordered")
+            return snapshot_id, track_ids
+    raise ReorderError("Playlist changed while it was being read, try again")
+
+
+def apply_moves(client, playlist_id, moves, snapshot_id):
+    """Issue the moves in order, each against the snapshot the previous one produced. Returns the final snapshot."""
+    for range_start, range_length, insert_before in moves:
+        result = client.playlist_reorder_items(
+            playlist_id,
+            range_start=range_start,
+            insert_before=insert_before,
+            range_length=range_length,
+            snapshot_id=snapshot_id
+        )
+        snapshot_id = result["snapshot_id"]
+    return snapshot_id
@@ -0,0 +1,43 @@
+import re
+import unicodedata
+
+from app.extensions import sp, resolution_cache
+from app.catalog import catalog_row
+
+#  Hits rarely change; misses are usually typos that get corrected, so expire them fast
+POSITIVE_TTL = 7 * 24 * 60 * 60
+NEGATIVE_TTL = 10 * 60
+
+_APOSTROPHES = re.compile(r"['\u2019`]")
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text):
+    """Case-fold and collapse punctuation and whitespace so near-identical queries share a key."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    text = _APOSTROPHES.sub("", text)  # "Don't" and "Dont" should match
+    text = _PUNCTUATION.sub(" ", text)
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def resolution_key(track_name, artist_name):
+    return f"{normalize_text(track_name)}|{normalize_text(artist_name)}"
+
+
+def resolve_track(track_name, artist_name):
+    """Return the best Spotify match for a track/artist pair as a catalog row plus its uri, or None.
+
+    Both hits and misses are cached; Spotify errors propagate and are not cached.
+    """
+    key = resolution_key(track_name, artist_name)
+    cached = resolution_cache.get(key)
+    if cached is not None:
+        return cached["track"]
+
+    items = sp.search(q=f"track:{track_name} artist:{artist_name}", type="track", limit=1)["tracks"]["items"]
+    track = None
+    if items:
+        track = dict(catalog_row(items[0]), uri=items[0]["uri"])
+    resolution_cache.set(key, {"track": track}, POSITIVE_TTL if track else NEGATIVE_TTL)
+    return track
@@ -1,14 +1,28 @@
-from flask import Blueprint, request, jsonify, redirect
+from flask import Blueprint, request, jsonify, redirect, url_for
 from app.auth import register_user, login_user, initiate_spotify_login, handle_spotify_callback
 from app.services import *
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from app.spotify_services import (
     search_track_by_artist, get_track_info,
-    get_album_info, fetch_trending_tracks, advanced_track_search
+    get_album_info, fetch_trending_tracks, advanced_track_search, get_cache_stats
 )
+from app.jobs import job_queue
 # Create API Blueprint
 api_bp = Blueprint("api", __name__)
 
+
+def _queue_job(kind, fn, *args):
+    """Run a playlist generator on the background job queue and answer 202 with the job id."""
+    user_id = get_jwt_identity()
+    if isinstance(user_id, dict):
+        user_id = user_id.get("id")
+    job = job_queue.submit(kind, int(user_id), fn, int(user_id), *args)
+    return jsonify({
+        "message": "Job queued",
+        "job_id": job.id,
+        "status_url": url_for("api.job_status", job_id=job.id)
+    }), 202
+
 #  User Authentication Routes
 @api_bp.route("/register", methods=["POST"])
 def register():
@@ -40,7 +54,7 @@ def create_playlist_route():
 @jwt_required()  # ADD THIS DECORATOR
 def get_playlists_route():
     try:
-        return get_playlists()
+        return get_playlists(request.args.get("cursor"), request.args.get("limit"))
     except Exception as e:
         return jsonify({"error": "Failed to fetch playlists", "details": str(e)}), 500
 
@@ -55,6 +69,16 @@ def add_track(playlist_id):
         return jsonify({"error": "Failed to add track", "details": str(e)}), 500
 
 
+@api_bp.route("/playlist/<int:playlist_id>/tracks:batch", methods=["POST"])
+@jwt_required()
+def add_tracks_batch(playlist_id):
+    try:
+        data = request.get_json()
+        return add_tracks_to_playlist_batch(playlist_id, data)
+    except Exception as e:
+        return jsonify({"error": "Failed to add tracks", "details": str(e)}), 500
+
+
 @api_bp.route("/music/remove", methods=["DELETE"])
 @jwt_required()
 def remove_track():
@@ -69,7 +93,7 @@ def remove_track():
 @jwt_required()
 def get_tracks(playlist_id):
     try:
-        return get_tracks_from_playlist(playlist_id)
+        return get_tracks_from_playlist(playlist_id, request.args.get("cursor"), request.args.get("limit"))
     except Exception as e:
         return jsonify({"error": "Failed to retrieve tracks", "details": str(e)}), 500
 
@@ -93,7 +117,12 @@ def album_info(album_id):
 #  Fetch Trending Tracks
 @api_bp.route("/spotify/trending", methods=["GET"])
 def trending_tracks():
-    return fetch_trending_tracks()
+    return fetch_trending_tracks(request.args)
+
+#  Catalog Cache Hit/Miss Counters
+@api_bp.route("/spotify/cache/stats", methods=["GET"])
+def cache_stats():
+    return get_cache_stats()
 
 #  Spotify OAuth Login
 @api_bp.route("/spotify/login", methods=["GET"])
@@ -162,6 +191,24 @@ def update_playlist(playlist_id):
         return jsonify({"error": "Update failed", "details": str(e)}), 500
 
 
+@api_bp.route("/playlist/<int:playlist_id>/sync", methods=["POST"])
+@jwt_required()
+def sync_playlist_route(playlist_id):
+    try:
+        return sync_playlist_with_spotify(playlist_id)
+    except Exception as e:
+        return jsonify({"error": "Sync failed", "details": str(e)}), 500
+
+
+@api_bp.route("/playlist/<int:playlist_id>/reorder", methods=["POST"])
+@jwt_required()
+def reorder_playlist_route(playlist_id):
+    try:
+        return reorder_playlist(playlist_id, request.get_json())
+    except Exception as e:
+        return jsonify({"error": "Reorder failed", "details": str(e)}), 500
+
+
 # routes.py - Update the feedback route
 
 @api_bp.route("/music/feedback", methods=["POST", "GET"])
@@ -194,7 +241,9 @@ def handle_feedback():
         result, status = get_track_comments(
             user_id=user_id,
             playlist_name=playlist_name,
-            track_name=track_name
+            track_name=track_name,
+            cursor=request.args.get("cursor"),
+            limit=request.args.get("limit")
         )
         return jsonify(result), status
 
@@ -210,7 +259,10 @@ def share_playlist(playlist_name):
 @api_bp.route("/playlist/time-capsule", methods=["POST"])
 @jwt_required()
 def create_time_capsule():
-    return generate_time_capsule_playlist()
+    try:
+        return _queue_job("time_capsule", generate_time_capsule_playlist)
+    except Exception as e:
+        return jsonify({"error": "Failed to queue time capsule", "details": str(e)}), 500
 
 
 
@@ -222,16 +274,34 @@ def create_time_machine():
     try:
         data = request.get_json()
         year = int(data.get('year'))
-        return generate_cultural_time_machine(year)
+        market = data.get('market', 'US')
+        size = int(data.get('size', 50))
+        return _queue_job("time_machine", generate_cultural_time_machine, year, market, size)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@api_bp.route("/playlist/recommended", methods=["GET"])
+@jwt_required()
+def recommended_tracks():
+    try:
+        return get_recommendations(request.args.get("limit"))
+    except Exception as e:
+        return jsonify({"error": "Failed to fetch recommendations", "details": str(e)}), 500
+
+@api_bp.route("/playlist/recommended", methods=["POST"])
+@jwt_required()
+def create_recommended_playlist():
+    try:
+        return _queue_job("recommended", generate_recommended_playlist, request.get_json(silent=True) or {})
+    except Exception as e:
+        return jsonify({"error": "Failed to queue recommended playlist", "details": str(e)}), 500
+
 @api_bp.route("/playlist/from-text", methods=["POST"])
 @jwt_required()
 def create_text_playlist():
     try:
         data = request.get_json()
-        return generate_text_based_playlist(data)
+        return _queue_job("from_text", generate_text_based_playlist, data)
     except Exception as e:
         return jsonify({"error": "Failed to create text-based playlist", "details": str(e)}), 500
 
@@ -240,7 +310,7 @@ def create_text_playlist():
 def merge_playlists_route():
     try:
         data = request.get_json()
-        return merge_playlists(data)
+        return _queue_job("merge", merge_playlists, data)
     except Exception as e:
         return jsonify({"error": "Failed to merge playlists", "details": str(e)}), 500
 
@@ -258,4 +328,13 @@ def advanced_search():
 @api_bp.route('/user/comments', methods=['GET'])
 @jwt_required()
 def get_user_comments_route():
-    return get_user_comments()
\ No newline at end of file
+    return get_user_comments(request.args.get("cursor"), request.args.get("limit"))
+
+
+@api_bp.route("/jobs/<job_id>", methods=["GET"])
+@jwt_required()
+def job_status(job_id):
+    try:
+        return get_job_status(job_id)
+    except Exception as e:
+        return jsonify({"error": "Failed to fetch job", "details": str(e)}), 500
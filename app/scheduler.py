@@ -0,0 +1,70 @@
+import logging
+import threading
+import time
+
+from app.rate_limit import spotify_context, BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+
+class Scheduler:
+    """Runs registered periodic tasks on one daemon thread inside the app context.
+
+    The thread starts with the first request, so CLI commands such as
+    `flask db upgrade` never run background work. Each process runs its own
+    scheduler, so tasks must be safe to run concurrently from several workers.
+    """
+
+    def __init__(self):
+        self.app = None
+        self._tasks = []  # [name, interval, fn, next run]
+        self._thread = None
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.app = app
+        if app.config.get("SCHEDULER_ENABLED", True):
+            app.before_request(self._ensure_started)
+
+    def every(self, interval, name=None):
+        """Decorator registering fn to run every interval seconds (first run right after start)."""
+        def register(fn):
+            with self._lock:
+                self._tasks.append([name or fn.__name__, interval, fn, 0])
+            self._wake.set()
+            return fn
+        return register
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            now = time.monotonic()
+            with self._lock:
+                due = [task for task in self._tasks if task[3] <= now]
+                for task in due:
+                    task[3] = now + task[1]
+            for name, _, fn, _ in due:
+                self._run(name, fn)
+
+            with self._lock:
+                next_run = min((task[3] for task in self._tasks), default=now + 60)
+            self._wake.wait(max(0.0, next_run - time.monotonic()))
+            self._wake.clear()
+
+    def _run(self, name, fn):
+        with self.app.app_context(), spotify_context(BACKGROUND):
+            try:
+                fn()
+            except Exception as e:
+                logger.error(f"Scheduled task {name} failed: {str(e)}")
+
+
+scheduler = Scheduler()
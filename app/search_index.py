@@ -0,0 +1,325 @@
+import gzip
+import heapq
+import json
+import logging
+import math
+import os
+import threading
+from collections import Counter
+from datetime import datetime
+
+import click
+from flask.cli import AppGroup
+
+from app.models import CatalogTrack
+from app.resolver import normalize_text
+from app.scheduler import scheduler
+from app.spotify_ids import id_to_int, int_to_id
+
+logger = logging.getLogger(__name__)
+
+#  BM25 parameters (the usual defaults)
+K1 = 1.2
+B = 0.75
+#  Field weights, in half units so term frequencies stay integers on disk
+FIELD_WEIGHTS = {"name": 2, "artist": 2, "album": 1, "genres": 3}
+#  Words that describe the request rather than the music
+STOPWORDS = frozenset(
+    "a an and the of for to in on with my me i some songs song music playlist tracks".split()
+)
+#  How often a process picks up catalog rows written by other processes
+CATCH_UP_INTERVAL = 60
+#  Terms in more documents than this only walk their highest-impact postings
+MAX_POSTINGS_WALKED = 2000
+#  Rebuild a term's top postings once its document count has drifted this much
+TOP_POSTINGS_DRIFT = 0.1
+
+
+def tokenize(text):
+    return [term for term in normalize_text(text).split() if term not in STOPWORDS]
+
+
+class BM25Index:
+    """In-memory inverted index over catalog tracks, scored with BM25.
+
+    Name, artist, album and genre terms are indexed with per-field weights.
+    Documents are keyed by their 128-bit track ID and can be added or
+    replaced one at a time. The on-disk form is gzipped JSON with
+    delta-encoded posting lists.
+
+    Searches walk at most MAX_POSTINGS_WALKED postings per term. For common
+    terms those are the documents where the term weighs most (cached and
+    rebuilt as the term's postings grow). The candidates found that way are
+    then scored against the common terms with direct lookups, so a track is
+    only missed when its every match is a common term where it ranks low.
+    """
+
+    def __init__(self):
+        self.postings = {}  # term -> {doc: weighted term frequency}
+        self.doc_terms = {}  # doc -> terms, so a replaced row can be unindexed
+        self.lengths = {}  # doc -> weighted length
+        self.popularity = {}  # doc -> Spotify popularity, used to break ties
+        self.total_length = 0
+        self.watermark = None  # Newest catalog updated_at indexed so far
+        self._top_postings = {}  # term -> (posting size when built, highest-impact docs)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, row):
+        """Index (or re-index) one catalog row given as a mapping."""
+        if not row.get("spotify_track_id") or not row.get("name"):
+            return
+        doc = id_to_int(row["spotify_track_id"])
+        frequencies = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            for term in tokenize(row.get(field)):
+                frequencies[term] += weight
+
+        with self._lock:
+            self._remove(doc)
+            for term, frequency in frequencies.items():
+                self.postings.setdefault(term, {})[doc] = frequency
+            self.doc_terms[doc] = tuple(frequencies)
+            self.lengths[doc] = sum(frequencies.values())
+            self.popularity[doc] = row.get("popularity") or 0
+            self.total_length += self.lengths[doc]
+
+    def _remove(self, doc):
+        for term in self.doc_terms.pop(doc, ()):
+            posting = self.postings.get(term)
+            if posting is not None:
+                posting.pop(doc, None)
+                if not posting:
+                    del self.postings[term]
+        self.total_length -= self.lengths.pop(doc, 0)
+        self.popularity.pop(doc, None)
+
+    def search(self, query, limit, min_coverage=0.5, max_postings=MAX_POSTINGS_WALKED):
+        """Return up to limit (spotify_track_id, score) pairs, best first.
+
+        A track must match at least min_coverage of the distinct query terms,
+        so one common word cannot carry a weak match. max_postings=None walks
+        every posting (exact, and slow on common terms).
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        with self._lock:
+            count = len(self.lengths)
+            if not count:
+                return []
+            average_length = self.total_length / count
+            scores = {}
+            matched = Counter()
+            pruned = []  # (posting, idf, docs already scored) for terms that only walked their top postings
+
+            def score(doc, frequency, idf):
+                norm = K1 * (1 - B + B * self.lengths[doc] / average_length)
+                scores[doc] = scores.get(doc, 0) + idf * frequency * (K1 + 1) / (frequency + norm)
+                matched[doc] += 1
+
+            # Rarest terms first, they find the candidates
+            for term in sorted((t for t in terms if t in self.postings), key=lambda t: len(self.postings[t])):
+                posting = self.postings[term]
+                idf = math.log(1 + (count - len(posting) + 0.5) / (len(posting) + 0.5))
+                if max_postings is None or len(posting) <= max_postings:
+                    for doc, frequency in posting.items():
+                        score(doc, frequency, idf)
+                    continue
+                top = self._top_docs(term, posting, max_postings, average_length)
+                for doc in top:
+                    frequency = posting.get(doc)
+                    if frequency:
+                        score(doc, frequency, idf)
+                pruned.append((posting, idf, top))
+
+            # Candidates outside a common term's top postings can still contain it
+            for posting, idf, top in pruned:
+                for doc in scores.keys() - top:
+                    frequency = posting.get(doc)
+                    if frequency:
+                        score(doc, frequency, idf)
+
+            required = math.ceil(len(terms) * min_coverage)
+            ranked = heapq.nlargest(
+                limit,
+                (doc for doc in scores if matched[doc] >= required),
+                key=lambda doc: (scores[doc], self.popularity.get(doc, 0))
+            )
+        return [(int_to_id(doc), round(scores[doc], 4)) for doc in ranked]
+
+    def _top_docs(self, term, posting, size, average_length):
+        """The size docs where term has the highest BM25 weight. Caller must hold the lock."""
+        built_for, top = self._top_postings.get(term, (0, None))
+        if top is None or len(top) < size or abs(len(posting) - built_for) > built_for * TOP_POSTINGS_DRIFT:
+            lengths = self.lengths
+            top = frozenset(heapq.nlargest(
+                size, posting,
+                key=lambda doc: posting[doc] / (posting[doc] + K1 * (1 - B + B * lengths[doc] / average_length))
+            ))
+            self._top_postings[term] = (len(posting), top)
+        return top
+
+    def refresh_top_postings(self, size=MAX_POSTINGS_WALKED):
+        """Rebuild stale top postings of common terms ahead of the searches that need them."""
+        with self._lock:
+            if not self.lengths:
+                return
+            average_length = self.total_length / len(self.lengths)
+            for term, posting in list(self.postings.items()):
+                if len(posting) > size:
+                    self._top_docs(term, posting, size, average_length)
+
+    def dumps(self):
+        with self._lock:
+            docs = sorted(self.lengths)
+            position = {doc: i for i, doc in enumerate(docs)}
+            postings = {}
+            for term, posting in self.postings.items():
+                entries = sorted((position[doc], frequency) for doc, frequency in posting.items())
+                previous = 0
+                deltas = []
+                for index, frequency in entries:
+                    deltas.extend((index - previous, frequency))
+                    previous = index
+                postings[term] = deltas
+            payload = {
+                "version": 1,
+                "watermark": self.watermark.isoformat() if self.watermark else None,
+                "docs": [int_to_id(doc) for doc in docs],
+                "popularity": [self.popularity.get(doc, 0) for doc in docs],
+                "postings": postings
+            }
+        return gzip.compress(json.dumps(payload, separators=(",", ":")).encode())
+
+    @classmethod
+    def loads(cls, data):
+        payload = json.loads(gzip.decompress(data))
+        index = cls()
+        docs = [id_to_int(spotify_id) for spotify_id in payload["docs"]]
+        terms = {doc: [] for doc in docs}
+        for term, deltas in payload["postings"].items():
+            posting = {}
+            position = 0
+            for i in range(0, len(deltas), 2):
+                position += deltas[i]
+                posting[docs[position]] = deltas[i + 1]
+                terms[docs[position]].append(term)
+            index.postings[term] = posting
+        for doc, popularity in zip(docs, payload["popularity"]):
+            index.doc_terms[doc] = tuple(terms[doc])
+            index.lengths[doc] = sum(index.postings[term][doc] for term in terms[doc])
+            index.popularity[doc] = popularity
+        index.total_length = sum(index.lengths.values())
+        index.watermark = datetime.fromisoformat(payload["watermark"]) if payload["watermark"] else None
+        return index
+
+    def catch_up(self):
+        """Index catalog rows written since the last build or catch-up."""
+        query = CatalogTrack.query
+        if self.watermark is not None:
+            # Inclusive, since rows can share a timestamp; re-indexing a row is harmless
+            query = query.filter(CatalogTrack.updated_at >= self.watermark)
+        added = 0
+        for track in query.order_by(CatalogTrack.updated_at).yield_per(1000):
+            self.add(catalog_fields(track))
+            if track.updated_at and (self.watermark is None or track.updated_at > self.watermark):
+                self.watermark = track.updated_at
+            added += 1
+        return added
+
+    def save(self, path):
+        payload = self.dumps()
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)  # Readers never see a half-written index
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            return cls.loads(f.read())
+
+
+def catalog_fields(track):
+    return {
+        "spotify_track_id": track.spotify_track_id,
+        "name": track.name,
+        "artist": track.artist,
+        "album": track.album,
+        "genres": track.genres,
+        "popularity": track.popularity
+    }
+
+
+class CatalogSearch:
+    """Process-wide index holder: loads the on-disk index once, then follows the catalog table."""
+
+    def __init__(self):
+        self.index = None
+        self.path = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.path = app.config.get("SEARCH_INDEX_PATH") or \
+            os.path.join(app.instance_path, "search_index.json.gz")
+        app.cli.add_command(search_index_cli)
+
+    def get(self):
+        with self._lock:
+            if self.index is None:
+                self.index = self._load() or BM25Index()
+            return self.index
+
+    def refresh(self):
+        """Index catalog rows written since the last refresh (scheduler task, never on the request path)."""
+        index = self.get()
+        added = index.catch_up()
+        index.refresh_top_postings()
+        return added
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            return BM25Index.load(self.path)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable search index: {str(e)}")
+            return None
+
+    def search(self, query, limit):
+        return self.get().search(query, limit)
+
+    def add_rows(self, rows):
+        """Index freshly recorded catalog rows right away (never raises)."""
+        if self.index is None:
+            return  # The first load reads them from the catalog table
+        try:
+            for row in rows:
+                if row:
+                    self.index.add(row)
+        except Exception as e:
+            logger.warning(f"Search index update failed: {str(e)}")
+
+
+catalog_search = CatalogSearch()
+
+
+@scheduler.every(CATCH_UP_INTERVAL)
+def catch_up_search_index():
+    catalog_search.refresh()
+
+search_index_cli = AppGroup("search-index", help="Local catalog search index.")
+
+
+@search_index_cli.command("build")
+def build_command():
+    """Rebuild the search index from the catalog table and write it to disk."""
+    index = BM25Index()
+    index.catch_up()
+    index.save(catalog_search.path)
+    click.echo(f"Indexed {len(index)} tracks and {len(index.postings)} terms -> {catalog_search.path} "
+               f"({os.path.getsize(catalog_search.path)} bytes)")
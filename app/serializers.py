@@ -12,16 +12,27 @@ class PlaylistSchema(Schema):
     description = fields.Str()
     created_at = fields.DateTime(dump_only=True)
     spotify_id = fields.Str()  #  Include Spotify ID
-    tracks = fields.Nested("TrackSchema", many=True)
+    tracks = fields.Nested("TrackSchema", many=True, exclude=("catalog",))
 
 
 
+class CatalogTrackSchema(Schema):
+    spotify_track_id = fields.Str()
+    album = fields.Str()
+    album_id = fields.Str()
+    release_date = fields.Str()
+    popularity = fields.Int()
+    duration_ms = fields.Int()
+    genres = fields.Str()
+
+
 class TrackSchema(Schema):
     id = fields.Int(dump_only=True)
     name = fields.Str(required=True)
     artist = fields.Str(required=True)
 
     playlist_id = fields.Int(required=True)
+    catalog = fields.Nested(CatalogTrackSchema, dump_only=True, allow_none=True)
 
 # Add to serializers.py
 class TrackCommentSchema(Schema):
@@ -33,6 +44,19 @@ class TrackCommentSchema(Schema):
     user = fields.Nested(UserSchema(only=("id", "username")))
     track = fields.Nested(TrackSchema(only=("id", "name", "artist")))
 
+class JobSchema(Schema):
+    id = fields.Str(dump_only=True)
+    kind = fields.Str()
+    status = fields.Str()
+    progress = fields.Int()
+    result = fields.Raw()
+    result_status = fields.Int()
+    error = fields.Str()
+    created_at = fields.DateTime(dump_only=True)
+    updated_at = fields.DateTime(dump_only=True)
+
+job_schema = JobSchema()
+
 track_comment_schema = TrackCommentSchema()
 track_comments_schema = TrackCommentSchema(many=True)
 
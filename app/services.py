@@ -1,12 +1,31 @@
 
-from flask import jsonify, request
+from flask import jsonify, request, url_for
 from flask_jwt_extended import jwt_required
 from app import db
-from app.models import Playlist, Track, Favorite, UserRating, TrackComment
+from app.models import Playlist, Track, Favorite, UserRating, TrackComment, Job, CatalogTrack
 from app.serializers import playlists_schema, track_schema, playlist_schema, track_comment_schema, \
-    track_comments_schema, tracks_schema
-from app.extensions import sp, sp_oauth  # Changed import source
+    track_comments_schema, tracks_schema, job_schema
+from app.extensions import sp, resolution_cache, spotify_breaker  # Changed import source
+from app.tokens import token_store
+from app.resolver import resolve_track, resolution_key
+from app.catalog import record_rows, remember_tracks, genre_rows
+from app.search_index import catalog_search
+from app.track_pools import sample_pool, POOL_SIZE
+from app.recommender import recommender, MIN_RATING, MAX_RATING
+from app.spotify_ids import is_valid_spotify_id
+from app.concurrency import fan_out, run_async
+from app.spotify_paging import fetch_first_pages, stream_playlist_items
+from app.merge import merge_track_ids, write_merge, PlaylistWriter, STRATEGIES as MERGE_STRATEGIES
+from app.sync import sync_playlist
+from app.reorder import read_order, plan_moves, apply_moves, ReorderError
+from app.jobs import job_queue, report_progress
+from app.circuit import CircuitOpenError
+from app.pagination import paginate, parse_limit, PaginationError
+from app.upsert import upsert
+from sqlalchemy import delete, insert
 from datetime import datetime
+from functools import partial
+from sqlalchemy.orm import joinedload, selectinload
 
 from flask_jwt_extended import get_jwt_identity
 
@@ -20,7 +39,7 @@ logger = logging.getLogger(__name__)
 from spotipy.exceptions import SpotifyException
 @jwt_required()
 def create_playlist(data):
-    """Create a playlist both locally and on Spotify."""
+    """Create a playlist both locally and on Spotify (queued while Spotify is unavailable)."""
     try:
         user_id = get_jwt_identity()
         if isinstance(user_id, dict):
@@ -35,58 +54,83 @@ def create_playlist(data):
         if not user_id or not name:
             return jsonify({"error": "Missing playlist name"}), 400
 
-        # Force token refresh if needed
-        token_info = sp_oauth.get_cached_token()
-        if not token_info or sp_oauth.is_token_expired(token_info):
-            token_info = sp_oauth.refresh_access_token(token_info['refresh_token'])
-            sp.set_auth(token_info['access_token'])
+        args = (name, description, is_public, is_collaborative)
+        if spotify_breaker.is_open():
+            return _queue_mutation("create_playlist", user_id, create_playlist_job, *args,
+                                   message="Spotify is unavailable; playlist creation queued")
 
-        spotify_user = sp.current_user()
-        spotify_user_id = spotify_user["id"]
-
-        # Create Spotify playlist
-        spotify_playlist = sp.user_playlist_create(
-            user=spotify_user_id,
-            name=name,
-            public=is_public,
-            collaborative=is_collaborative,
-            description=description
-        )
-
-        # Save to database
-        new_playlist = Playlist(
-            user_id=user_id,
-            name=name,
-            description=description,
-            spotify_id=spotify_playlist["id"]
-        )
-        db.session.add(new_playlist)
-        db.session.commit()
-
-        return jsonify({
-            "message": "Playlist created successfully!",
-            "playlist": playlist_schema.dump(new_playlist)
-        }), 201
+        body, status = create_playlist_job(user_id, *args)
+        return jsonify(body), status
 
+    except CircuitOpenError:
+        #  Raised before the call went out, so nothing was created on Spotify
+        db.session.rollback()
+        return _queue_mutation("create_playlist", user_id, create_playlist_job, *args,
+                               message="Spotify is unavailable; playlist creation queued")
     except Exception as e:
         db.session.rollback()
         logger.error(f"Playlist creation failed: {str(e)}")
         return jsonify({"error": "Failed to create playlist", "details": str(e)}), 500
 
+
+def create_playlist_job(user_id, name, description, is_public, is_collaborative):
+    """Create the Spotify playlist, then the local row (returns a job-style (body, status)).
+
+    CircuitOpenError propagates so the caller can queue the creation instead.
+    """
+    # Client bound to this user's token (refreshed ahead of expiry)
+    user_sp = token_store.client_for(user_id)
+    if user_sp is None:
+        return {"error": "Spotify account not linked"}, 401
+
+    spotify_user = user_sp.current_user()
+    spotify_user_id = spotify_user["id"]
+
+    # Create Spotify playlist
+    spotify_playlist = user_sp.user_playlist_create(
+        user=spotify_user_id,
+        name=name,
+        public=is_public,
+        collaborative=is_collaborative,
+        description=description
+    )
+
+    # Save to database
+    new_playlist = Playlist(
+        user_id=user_id,
+        name=name,
+        description=description,
+        spotify_id=spotify_playlist["id"]
+    )
+    db.session.add(new_playlist)
+    db.session.commit()
+
+    return {
+        "message": "Playlist created successfully!",
+        "playlist": playlist_schema.dump(new_playlist)
+    }, 201
+
 @jwt_required()
-def get_playlists():
-    """Retrieve all playlists for the authenticated user."""
+def get_playlists(cursor=None, limit=None):
+    """Retrieve a page of playlists for the authenticated user."""
     user_id = get_jwt_identity()
     if isinstance(user_id, dict):
         user_id = user_id.get("id")
     else:
         user_id = user_id
-    playlists = Playlist.query.filter_by(user_id=user_id).all()
+    # Load every playlist's tracks in one extra IN query instead of one per playlist
+    try:
+        playlists, next_cursor = paginate(
+            Playlist.query.options(selectinload(Playlist.tracks)).filter_by(user_id=user_id),
+            Playlist.id, cursor, limit
+        )
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
 
-    if not playlists:
-        return jsonify({"message": "No playlists found"}), 200
+    if not playlists and not cursor:
+        return jsonify({"message": "No playlists found", "playlists": [], "next_cursor": None}), 200
 
-    return jsonify(playlists_schema.dump(playlists)), 200
+    return jsonify({"playlists": playlists_schema.dump(playlists), "next_cursor": next_cursor}), 200
 
 
 @jwt_required()
@@ -113,26 +157,35 @@ def add_track_to_playlist(playlist_id, data):
         if not track_name or not artist_name:
             return jsonify({"error": "Invalid track name or artist"}), 400
 
-        #  Search Track on Spotify
-        search_query = f"track:{track_name} artist:{artist_name}"
-        search_result = sp.search(q=search_query, type="track", limit=1)
+        user_sp = token_store.client_for(user_id)
+        if user_sp is None:
+            return jsonify({"error": "Spotify account not linked"}), 401
 
-        if not search_result["tracks"]["items"]:
+        #  Spotify is down: save locally and queue the push instead of waiting on it
+        if spotify_breaker.is_open():
+            return _add_track_later(playlist, user_id, track_name, artist_name, album_name)
+
+        #  Resolve Track on Spotify (cached, including misses)
+        resolved = resolve_track(track_name, artist_name)
+
+        if not resolved:
             return jsonify({"error": "Track not found on Spotify"}), 404
 
-        spotify_track_uri = search_result["tracks"]["items"][0]["uri"]
+        spotify_track_uri = resolved["uri"]
         # Extract Spotify Track ID from URI (NEW)
         spotify_track_id = spotify_track_uri.split(":")[-1]  # Get last part of "spotify:track:abc123"
         #  Add Track to Spotify Playlist
-        sp.playlist_add_items(playlist_id=playlist.spotify_id, items=[spotify_track_uri])
+        user_sp.playlist_add_items(playlist_id=playlist.spotify_id, items=[spotify_track_uri])
 
-        #  Save to Local Database
+        #  Save to Local Database (catalog row first, Track references it)
+        record_rows([resolved])
         new_track = Track(
             name=track_name,
             artist=artist_name,
             album=album_name if album_name else None,
             playlist_id=playlist.id,
-            spotify_track_id=spotify_track_id  # Store Spotify ID (NEW)
+            spotify_track_id=spotify_track_id,  # Store Spotify ID (NEW)
+            synced=True
         )
         db.session.add(new_track)
         db.session.commit()
@@ -144,13 +197,167 @@ def add_track_to_playlist(playlist_id, data):
             "spotify_playlist_id": playlist.spotify_id
         }), 201
 
+    except CircuitOpenError:
+        #  Raised before the call went out, so nothing was added on Spotify
+        db.session.rollback()
+        return _add_track_later(playlist, user_id, track_name, artist_name, album_name)
     except Exception as e:
         db.session.rollback()
         return jsonify({"error": "Failed to add track", "details": str(e)}), 500
 
 
+def _add_track_later(playlist, user_id, track_name, artist_name, album_name):
+    """Save a track as unsynced and queue a sync to push it, using only a cached resolution."""
+    cached = resolution_cache.get(resolution_key(track_name, artist_name))
+    if cached is None:
+        return jsonify({"error": "Spotify is unavailable and this track has not been resolved before"}), 503, \
+            {"Retry-After": str(spotify_breaker.retry_after())}
+    resolved = cached["track"]
+    if not resolved:
+        return jsonify({"error": "Track not found on Spotify"}), 404
+
+    record_rows([resolved])
+    new_track = Track(
+        name=track_name,
+        artist=artist_name,
+        album=album_name if album_name else None,
+        playlist_id=playlist.id,
+        spotify_track_id=resolved["spotify_track_id"],
+        synced=False  # Pushed by the queued sync
+    )
+    db.session.add(new_track)
+    db.session.commit()
+    return _queue_sync(
+        user_id, playlist.id, "Spotify is unavailable; track saved and queued for sync",
+        track=track_schema.dump(new_track)
+    )
+
+
+#  Most tracks accepted by one batch request
+BATCH_ADD_LIMIT = 500
+
+
+def _search_track(track_name, artist_name):
+    """Resolve one track, returning (track, error) so batch items fail independently."""
+    try:
+        track = resolve_track(track_name, artist_name)
+        return (track, None) if track else (None, "Track not found on Spotify")
+    except Exception as e:
+        return None, f"Spotify search failed: {str(e)}"
+
+
+@jwt_required()
+def add_tracks_to_playlist_batch(playlist_id, data):
+    """Add many tracks to a playlist with concurrent searches and batched writes (Both Local & Spotify)."""
+    try:
+        user_id = get_jwt_identity()
+        if isinstance(user_id, dict):
+            user_id = user_id.get("id")
+        else:
+            user_id = user_id
+        entries = (data or {}).get("tracks")
+
+        if not isinstance(entries, list) or not entries:
+            return jsonify({"error": "A non-empty 'tracks' list is required"}), 400
+
+        if len(entries) > BATCH_ADD_LIMIT:
+            return jsonify({"error": f"At most {BATCH_ADD_LIMIT} tracks per batch"}), 400
+
+        playlist = Playlist.query.filter_by(id=playlist_id, user_id=user_id).first()
+
+        if not playlist:
+            return jsonify({"error": "Playlist not found"}), 404
+
+        if not playlist.spotify_id:
+            return jsonify({"error": "This playlist does not have a linked Spotify ID"}), 400
+
+        user_sp = token_store.client_for(user_id)
+        if user_sp is None:
+            return jsonify({"error": "Spotify account not linked"}), 401
+
+        #  Validate entries and dedupe identical searches
+        results = [{"index": i, "status": "pending"} for i in range(len(entries))]
+        queries = {}  # normalized key -> (name, artist) to resolve
+        for result, entry in zip(results, entries):
+            entry = entry if isinstance(entry, dict) else {}
+            result["name"] = (entry.get("name") or "").strip()
+            result["artist"] = (entry.get("artist") or "").strip()
+            result["album"] = (entry.get("album") or "").strip() or None
+            if not result["name"] or not result["artist"]:
+                result.update(status="failed", error="Invalid track name or artist")
+                continue
+            result["key"] = resolution_key(result["name"], result["artist"])
+            queries.setdefault(result["key"], (result["name"], result["artist"]))
+
+        #  Resolve every distinct search concurrently
+        keys = list(queries)
+        resolved = dict(zip(keys, fan_out(*[partial(_search_track, *queries[key]) for key in keys])))
+
+        #  Dedupe on the resolved Spotify track (spellings differ) and on name (unique per playlist)
+        existing = db.session.query(Track.name, Track.spotify_track_id).filter_by(playlist_id=playlist.id).all()
+        existing_names = {name for name, _ in existing}
+        existing_ids = {spotify_track_id for _, spotify_track_id in existing}
+        to_add = []
+        for result in results:
+            if result["status"] != "pending":
+                continue
+            track, error = resolved[result.pop("key")]
+            if error:
+                result.update(status="failed", error=error)
+            elif track["spotify_track_id"] in existing_ids or result["name"] in existing_names:
+                result.update(status="failed", error="Track already in playlist")
+            else:
+                existing_names.add(result["name"])
+                existing_ids.add(track["spotify_track_id"])
+                result["spotify_track_uri"] = track["uri"]
+                result["_catalog"] = track
+                to_add.append(result)
+
+        #  Add to Spotify 100 URIs per call; a failed chunk only fails its own items
+        added = []
+        for i in range(0, len(to_add), 100):
+            chunk = to_add[i:i + 100]
+            try:
+                user_sp.playlist_add_items(playlist.spotify_id, [r["spotify_track_uri"] for r in chunk])
+                added.extend(chunk)
+            except Exception as e:
+                for result in chunk:
+                    result.update(status="failed", error=f"Spotify add failed: {str(e)}")
+
+        #  Save every added track in one bulk insert (catalog rows first, Track references them)
+        if added:
+            record_rows(r["_catalog"] for r in added)
+            db.session.execute(insert(Track), [{
+                "name": r["name"],
+                "name_lower": r["name"].lower(),
+                "artist": r["artist"],
+                "album": r["album"],
+                "playlist_id": playlist.id,
+                "spotify_track_id": r["spotify_track_uri"].split(":")[-1],
+                "synced": True
+            } for r in added])
+            db.session.commit()
+            for result in added:
+                result["status"] = "added"
+        for result in to_add:
+            result.pop("_catalog")
+
+        failed = len(results) - len(added)
+        return jsonify({
+            "message": f"Added {len(added)} of {len(results)} tracks",
+            "spotify_playlist_id": playlist.spotify_id,
+            "added": len(added),
+            "failed": failed,
+            "results": results
+        }), 201 if not failed else (207 if added else 400)
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({"error": "Failed to add tracks", "details": str(e)}), 500
+
+
 def remove_track_from_playlist(data):
-    """Remove track by playlist/track names"""
+    """Remove track by playlist/track names (queued while Spotify is unavailable)"""
     user_id = get_jwt_identity()
     if isinstance(user_id, dict):
         user_id = user_id.get("id")
@@ -172,60 +379,28 @@ def remove_track_from_playlist(data):
         if not playlist:
             return jsonify({"error": "Playlist not found"}), 404
 
-        # Find track with case-insensitive search
+        # Find track with case-insensitive search (indexed lower-case name)
         track = Track.query.filter(
             Track.playlist_id == playlist.id,
-            Track.name.ilike(track_name)
+            Track.name_lower == track_name.lower()
         ).first()
 
         if not track:
             return jsonify({"error": "Track not found"}), 404
 
-        # Validate Spotify references
-        spotify_errors = []
-        if not playlist.spotify_id:
-            spotify_errors.append("Playlist not linked to Spotify")
+        # Spotify is down: keep the track until Spotify has actually removed it
+        if spotify_breaker.is_open() and playlist.spotify_id and track.spotify_track_id:
+            return _queue_mutation("remove_track", user_id, remove_track_job, playlist.id, track.id,
+                                   message="Spotify is unavailable; removal queued")
 
-        if not track.spotify_track_id:
-            spotify_errors.append("Track missing Spotify reference")
-
-        # Only attempt Spotify removal if both IDs exist
-        if playlist.spotify_id and track.spotify_track_id:
-            try:
-                # Construct proper Spotify URI
-                track_uri = f"spotify:track:{track.spotify_track_id}"
-
-                # Verify URI format
-                if len(track.spotify_track_id) != 22:  # Spotify IDs are 22 chars
-                    raise ValueError("Invalid Spotify track ID format")
-
-                # Remove from Spotify
-                sp.playlist_remove_all_occurrences_of_items(
-                    playlist_id=playlist.spotify_id,
-                    items=[track_uri]  # Note: items should be list of URIs, not dicts
-                )
-            except Exception as e:
-                return jsonify({
-                    "error": "Spotify removal failed",
-                    "details": str(e),
-                    "debug_info": {
-                        "spotify_playlist_id": playlist.spotify_id,
-                        "spotify_track_id": track.spotify_track_id,
-                        "constructed_uri": track_uri
-                    }
-                }), 500
-
-        # Local database removal
-        db.session.delete(track)
-        db.session.commit()
-
-        return jsonify({
-            "message": "Track removed",
-            "playlist": playlist.name,
-            "track": track.name,
-            "spotify_errors": spotify_errors if spotify_errors else None
-        }), 200
+        body, status = remove_track_job(user_id, playlist.id, track.id)
+        return jsonify(body), status
 
+    except CircuitOpenError:
+        #  Raised before the call went out, so nothing was removed on Spotify
+        db.session.rollback()
+        return _queue_mutation("remove_track", user_id, remove_track_job, playlist.id, track.id,
+                               message="Spotify is unavailable; removal queued")
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -235,9 +410,70 @@ def remove_track_from_playlist(data):
         }), 500
 
 
+def remove_track_job(user_id, playlist_id, track_id):
+    """Remove a track from Spotify, then locally (returns a job-style (body, status)).
+
+    CircuitOpenError propagates so the caller can queue the removal instead.
+    """
+    playlist = Playlist.query.filter_by(id=playlist_id, user_id=user_id).first()
+    track = Track.query.filter_by(id=track_id, playlist_id=playlist_id).first() if playlist else None
+
+    if not track:
+        return {"error": "Track not found"}, 404
 
-def get_tracks_from_playlist(playlist_id):
-    """Retrieve all tracks from a playlist."""
+    # Validate Spotify references
+    spotify_errors = []
+    if not playlist.spotify_id:
+        spotify_errors.append("Playlist not linked to Spotify")
+
+    if not track.spotify_track_id:
+        spotify_errors.append("Track missing Spotify reference")
+
+    # Only attempt Spotify removal if both IDs exist
+    if playlist.spotify_id and track.spotify_track_id:
+        user_sp = token_store.client_for(user_id)
+        if user_sp is None:
+            return {"error": "Spotify account not linked"}, 401
+        try:
+            # Construct proper Spotify URI
+            track_uri = f"spotify:track:{track.spotify_track_id}"
+
+            # Verify URI format
+            if len(track.spotify_track_id) != 22:  # Spotify IDs are 22 chars
+                raise ValueError("Invalid Spotify track ID format")
+
+            # Remove from Spotify
+            user_sp.playlist_remove_all_occurrences_of_items(
+                playlist_id=playlist.spotify_id,
+                items=[track_uri]  # Note: items should be list of URIs, not dicts
+            )
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            return {
+                "error": "Spotify removal failed",
+                "details": str(e),
+                "debug_info": {
+                    "spotify_playlist_id": playlist.spotify_id,
+                    "spotify_track_id": track.spotify_track_id,
+                    "constructed_uri": track_uri
+                }
+            }, 500
+
+    # Local database removal
+    db.session.delete(track)
+    db.session.commit()
+
+    return {
+        "message": "Track removed",
+        "playlist": playlist.name,
+        "track": track.name,
+        "spotify_errors": spotify_errors if spotify_errors else None
+    }, 200
+
+
+def get_tracks_from_playlist(playlist_id, cursor=None, limit=None):
+    """Retrieve a page of tracks from a playlist."""
     user_id = get_jwt_identity()
     if isinstance(user_id, dict):
         user_id = user_id.get("id")
@@ -248,14 +484,21 @@ def get_tracks_from_playlist(playlist_id):
     if not playlist:
         return jsonify({"error": "Playlist not found"}), 404
 
-    tracks = Track.query.filter_by(playlist_id=playlist.id).all()
+    try:
+        tracks, next_cursor = paginate(
+            Track.query.options(joinedload(Track.catalog)).filter_by(playlist_id=playlist.id),
+            Track.id, cursor, limit
+        )
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
 
-    if not tracks:
-        return jsonify({"message": "No tracks found in this playlist"}), 200
+    if not tracks and not cursor:
+        return jsonify({"message": "No tracks found in this playlist", "tracks": [], "next_cursor": None}), 200
 
     # Use the correct schema for multiple tracks and wrap in a proper response structure
     return jsonify({
-        "tracks": tracks_schema.dump(tracks)
+        "tracks": tracks_schema.dump(tracks),
+        "next_cursor": next_cursor
     }), 200
 
 
@@ -274,6 +517,9 @@ def handle_song_feedback(data):
     if not all([playlist_name, track_name, rating]):
         return jsonify({"error": "Missing required fields"}), 400
 
+    if isinstance(rating, bool) or not isinstance(rating, int) or not MIN_RATING <= rating <= MAX_RATING:
+        return jsonify({"error": f"Rating must be an integer from {MIN_RATING} to {MAX_RATING}"}), 400
+
     try:
         # Get playlist by name
         playlist = Playlist.query.filter_by(
@@ -300,22 +546,15 @@ def handle_song_feedback(data):
                 "solution": "Re-add this track to generate proper ID"
             }), 400
 
-        # Update or create rating
-        existing = UserRating.query.filter_by(
-            user_id=user_id,
-            spotify_track_id=track.spotify_track_id
-        ).first()
-
-        if existing:
-            existing.rating = rating
-        else:
-            db.session.add(UserRating(
-                user_id=user_id,
-                spotify_track_id=track.spotify_track_id,
-                rating=rating
-            ))
-
+        # Update or create rating in one statement
+        upsert(
+            UserRating,
+            {"user_id": user_id, "spotify_track_id": track.spotify_track_id, "rating": rating},
+            index_elements=["user_id", "spotify_track_id"],
+            update=["rating"]
+        )
         db.session.commit()
+        recommender.record_rating(int(user_id), track.spotify_track_id, rating)
         return jsonify({
             "message": "Rating updated",
             "playlist": playlist.name,
@@ -371,31 +610,32 @@ def handle_favorite_operation(data):
             spotify_id = data.get("spotify_id")
             if not spotify_id:
                 return jsonify({"error": "Missing Spotify ID for album"}), 400
+            if not is_valid_spotify_id(spotify_id):
+                return jsonify({"error": "Invalid Spotify ID for album"}), 400
 
         if request.method == "POST":
-            if Favorite.query.filter_by(
-                    user_id=user_id,
-                    spotify_id=spotify_id
-            ).first():
+            inserted = upsert(
+                Favorite,
+                {"user_id": user_id, "spotify_id": spotify_id, "type": item_type},
+                index_elements=["user_id", "spotify_id"]
+            )
+            if inserted == 0:
+                db.session.rollback()
                 return jsonify({"error": "Already favorited"}), 400
 
-            db.session.add(Favorite(
-                user_id=user_id,
-                spotify_id=spotify_id,
-                type=item_type
-            ))
             message = "Added to favorites"
             status = 201
         else:
-            favorite = Favorite.query.filter_by(
-                user_id=user_id,
-                spotify_id=spotify_id
-            ).first()
-
-            if not favorite:
+            result = db.session.execute(
+                delete(Favorite).where(
+                    Favorite.user_id == user_id,
+                    Favorite.spotify_id == spotify_id
+                )
+            )
+            if result.rowcount == 0:
+                db.session.rollback()
                 return jsonify({"error": "Favorite not found"}), 404
 
-            db.session.delete(favorite)
             message = "Removed from favorites"
             status = 200
 
@@ -408,7 +648,7 @@ def handle_favorite_operation(data):
 
 
 def update_playlist_details(playlist_id, data):
-    """Update playlist metadata"""
+    """Update playlist metadata (queued while Spotify is unavailable)"""
     user_id = get_jwt_identity()
     if isinstance(user_id, dict):
         user_id = user_id.get("id")
@@ -419,24 +659,190 @@ def update_playlist_details(playlist_id, data):
     if not playlist:
         return jsonify({"error": "Playlist not found"}), 404
 
-    if name := data.get("name"):
+    args = (playlist.id, data.get("name"), data.get("description"))
+    if playlist.spotify_id and spotify_breaker.is_open():
+        return _queue_mutation("update_playlist", user_id, update_playlist_details_job, *args,
+                               message="Spotify is unavailable; update queued")
+
+    try:
+        body, status = update_playlist_details_job(user_id, *args)
+    except CircuitOpenError:
+        #  Raised before the call went out, so Spotify still has the old details
+        db.session.rollback()
+        return _queue_mutation("update_playlist", user_id, update_playlist_details_job, *args,
+                               message="Spotify is unavailable; update queued")
+    return jsonify(body), status
+
+
+def update_playlist_details_job(user_id, playlist_id, name=None, description=None):
+    """Change the details on Spotify, then locally (returns a job-style (body, status)).
+
+    CircuitOpenError propagates so the caller can queue the update instead.
+    """
+    playlist = Playlist.query.filter_by(id=playlist_id, user_id=user_id).first()
+
+    if not playlist:
+        return {"error": "Playlist not found"}, 404
+
+    if name:
         playlist.name = name
-    if description := data.get("description"):
+    if description:
         playlist.description = description
 
     # Sync with Spotify
     if playlist.spotify_id:
+        user_sp = token_store.client_for(user_id)
+        if user_sp is None:
+            db.session.rollback()
+            return {"error": "Spotify account not linked"}, 401
         try:
-            sp.playlist_change_details(
+            user_sp.playlist_change_details(
                 playlist_id=playlist.spotify_id,
                 name=playlist.name,
                 description=playlist.description
             )
+        except CircuitOpenError:
+            raise
         except Exception as e:
-            return jsonify({"error": "Spotify update failed", "details": str(e)}), 500
+            db.session.rollback()
+            return {"error": "Spotify update failed", "details": str(e)}, 500
 
     db.session.commit()
-    return jsonify({"message": "Playlist updated", "playlist": playlist_schema.dump(playlist)}), 200
+    return {"message": "Playlist updated", "playlist": playlist_schema.dump(playlist)}, 200
+
+
+def sync_playlist_job(user_id, playlist_id):
+    """Incrementally reconcile a local playlist with its Spotify copy (returns a job-style (body, status))"""
+    playlist = Playlist.query.filter_by(id=playlist_id, user_id=user_id).first()
+
+    if not playlist:
+        return {"error": "Playlist not found"}, 404
+
+    if not playlist.spotify_id:
+        return {"error": "This playlist does not have a linked Spotify ID"}, 400
+
+    user_sp = token_store.client_for(user_id)
+    if user_sp is None:
+        return {"error": "Spotify account not linked"}, 401
+
+    try:
+        summary = sync_playlist(user_sp, playlist)
+        return {"message": "Playlist synced", "playlist_id": playlist.id, "sync": summary}, 200
+    except CircuitOpenError:
+        db.session.rollback()
+        raise  # The caller queues the sync instead
+    except SpotifyException as e:
+        db.session.rollback()
+        return {"error": "Spotify sync failed", "details": str(e)}, e.http_status
+    except Exception as e:
+        db.session.rollback()
+        return {"error": "Sync failed", "details": str(e)}, 500
+
+
+def _queue_sync(user_id, playlist_id, message, **extra):
+    """Queue a sync job; while Spotify is unavailable it stays deferred until the circuit breaker recovers."""
+    return _queue_mutation("sync", user_id, sync_playlist_job, playlist_id, message=message, **extra)
+
+
+def _queue_mutation(kind, user_id, fn, *args, message, **extra):
+    """Queue fn(user_id, *args) as a job; it stays deferred until the circuit breaker recovers."""
+    job = job_queue.submit(kind, int(user_id), fn, int(user_id), *args)
+    return jsonify({
+        "message": message,
+        "job_id": job.id,
+        "status_url": url_for("api.job_status", job_id=job.id),
+        **extra
+    }), 202
+
+
+def sync_playlist_with_spotify(playlist_id):
+    """Incrementally reconcile a local playlist with its Spotify copy (queued while Spotify is unavailable)"""
+    user_id = get_jwt_identity()
+    if isinstance(user_id, dict):
+        user_id = user_id.get("id")
+    else:
+        user_id = user_id
+
+    if spotify_breaker.is_open():
+        if not Playlist.query.filter_by(id=playlist_id, user_id=user_id).first():
+            return jsonify({"error": "Playlist not found"}), 404
+        return _queue_sync(user_id, playlist_id, "Spotify is unavailable; sync queued")
+
+    try:
+        body, status = sync_playlist_job(user_id, playlist_id)
+    except CircuitOpenError:
+        return _queue_sync(user_id, playlist_id, "Spotify is unavailable; sync queued")
+    return jsonify(body), status
+
+
+#  Larger reorder plans must opt in to replacing the item list instead
+MAX_REORDER_MOVES = 300
+
+
+def reorder_playlist(playlist_id, data):
+    """Reorder a Spotify playlist to a target order with the fewest range moves"""
+    user_id = get_jwt_identity()
+    if isinstance(user_id, dict):
+        user_id = user_id.get("id")
+    else:
+        user_id = user_id
+    target = (data or {}).get("track_ids")
+
+    if not isinstance(target, list) or not target:
+        return jsonify({"error": "track_ids must be a non-empty list in the desired order"}), 400
+
+    playlist = Playlist.query.filter_by(id=playlist_id, user_id=user_id).first()
+    if not playlist:
+        return jsonify({"error": "Playlist not found"}), 404
+
+    if not playlist.spotify_id:
+        return jsonify({"error": "This playlist does not have a linked Spotify ID"}), 400
+
+    user_sp = token_store.client_for(user_id)
+    if user_sp is None:
+        return jsonify({"error": "Spotify account not linked"}), 401
+
+    try:
+        snapshot_id, current = read_order(user_sp, playlist)
+        moves = plan_moves(current, target)
+        replace_calls = -(-len(current) // 100)
+
+        if len(moves) > MAX_REORDER_MOVES:
+            if not data.get("allow_replace"):
+                return jsonify({
+                    "error": "Reorder needs too many moves",
+                    "moves": len(moves),
+                    "solution": "Send allow_replace=true to rewrite the list instead (resets added_at)"
+                }), 422
+            # Rewriting the list is cheaper than this many moves
+            result = user_sp.playlist_replace_items(playlist.spotify_id, [f"spotify:track:{t}" for t in target[:100]])
+            for i in range(100, len(target), 100):
+                result = user_sp.playlist_add_items(
+                    playlist.spotify_id, [f"spotify:track:{t}" for t in target[i:i + 100]]
+                )
+            new_snapshot_id = result["snapshot_id"]
+            method, calls = "replace", replace_calls
+        else:
+            new_snapshot_id = apply_moves(user_sp, playlist.spotify_id, moves, snapshot_id)
+            method, calls = "move", len(moves)
+
+        # Only membership matters to sync, so an in-sync playlist stays in sync
+        if playlist.snapshot_id == snapshot_id:
+            playlist.snapshot_id = new_snapshot_id
+            db.session.commit()
+
+        return jsonify({
+            "message": "Playlist reordered",
+            "playlist_id": playlist.id,
+            "method": method,
+            "api_calls": calls,
+            "snapshot_id": new_snapshot_id
+        }), 200
+    except ReorderError as e:
+        return jsonify({"error": str(e)}), 400
+    except SpotifyException as e:
+        db.session.rollback()
+        return jsonify({"error": "Spotify reorder failed", "details": str(e)}), e.http_status
 
 
 # services.py - Add these new functions
@@ -453,10 +859,10 @@ def add_comment_to_track(user_id, playlist_name, track_name, comment):
         if not playlist:
             return {"error": "Playlist not found"}, 404
 
-        # Find track with case-insensitive search
+        # Find track with case-insensitive search (indexed lower-case name)
         track = Track.query.filter(
             Track.playlist_id == playlist.id,
-            Track.name.ilike(track_name)
+            Track.name_lower == track_name.lower()
         ).first()
 
         if not track:
@@ -482,8 +888,8 @@ def add_comment_to_track(user_id, playlist_name, track_name, comment):
 
 
 
-def get_track_comments(user_id, playlist_name, track_name):
-    """Retrieve comments for a specific track"""
+def get_track_comments(user_id, playlist_name, track_name, cursor=None, limit=None):
+    """Retrieve a page of comments for a specific track"""
     try:
         # Verify playlist ownership
         playlist = Playlist.query.filter_by(
@@ -494,19 +900,26 @@ def get_track_comments(user_id, playlist_name, track_name):
         if not playlist:
             return {"error": "Playlist not found"}, 404
 
-        # Find track with case-insensitive search
+        # Find track with case-insensitive search (indexed lower-case name)
         track = Track.query.filter(
             Track.playlist_id == playlist.id,
-            Track.name.ilike(track_name)
+            Track.name_lower == track_name.lower()
         ).first()
 
         if not track:
             return {"error": "Track not found in playlist"}, 404
 
-        # Get all comments for this track
-        comments = TrackComment.query.filter_by(track_id=track.id).all()
-        return {"comments": track_comments_schema.dump(comments)}, 200
+        # Get a page of comments for this track
+        comments, next_cursor = paginate(
+            TrackComment.query.options(
+                joinedload(TrackComment.user), joinedload(TrackComment.track)
+            ).filter_by(track_id=track.id),
+            TrackComment.id, cursor, limit
+        )
+        return {"comments": track_comments_schema.dump(comments), "next_cursor": next_cursor}, 200
 
+    except PaginationError as e:
+        return {"error": str(e)}, 400
     except Exception as e:
         return {"error": "Failed to retrieve comments", "details": str(e)}, 500
 
@@ -544,31 +957,39 @@ def generate_share_link(user_id, playlist_name):
 
 
 # ------ Time Capsule Playlists ------
-def generate_time_capsule_playlist():
+def generate_time_capsule_playlist(user_id):
+    """Create a playlist from the user's top tracks across all time ranges (runs as a job)"""
     try:
+        user_sp = token_store.client_for(user_id)
+        if user_sp is None:
+            return {"error": "Spotify account not linked"}, 401
+
         time_ranges = ['short_term', 'medium_term', 'long_term']
         all_tracks = []
 
-        for tr in time_ranges:
-            top_tracks = sp.current_user_top_tracks(
-                limit=20,
-                time_range=tr
-            )
+        # Fetch every time range and the profile in parallel
+        *top_tracks_by_range, me = fan_out(
+            *[partial(user_sp.current_user_top_tracks, limit=20, time_range=tr) for tr in time_ranges],
+            user_sp.me
+        )
+        for top_tracks in top_tracks_by_range:
             all_tracks.extend([item['uri'] for item in top_tracks['items']])
+        remember_tracks([item for top_tracks in top_tracks_by_range for item in top_tracks['items']])
+        report_progress(50)
 
         # Create playlist
-        playlist = sp.user_playlist_create(
-            user=sp.me()['id'],
+        playlist = user_sp.user_playlist_create(
+            user=me['id'],
             name=f"Time Capsule {datetime.now().year}",
             public=False
         )
 
-        # Add unique tracks
-        sp.playlist_add_items(playlist['id'], list(set(all_tracks)))
+        # Add unique tracks, keeping short -> long term order
+        user_sp.playlist_add_items(playlist['id'], list(dict.fromkeys(all_tracks)))
 
-        return jsonify({
+        return {
             "playlist_url": playlist['external_urls']['spotify']
-        }), 201
+        }, 201
     except SpotifyException as e:
         return {"error": str(e)}, 500
 
@@ -583,44 +1004,52 @@ def generate_time_capsule_playlist():
 
 
 # ----Cultural Time Machine
-def generate_cultural_time_machine(year):
+def generate_cultural_time_machine(user_id, year, market="US", size=50):
+    """Create or refresh a playlist sampled from the (year, market) track pool (runs as a job)"""
     try:
-        user_id = get_jwt_identity()
-        if isinstance(user_id, dict):
-            user_id = user_id.get("id")
-        else:
-            user_id = user_id
         if year < 1900 or year > datetime.now().year:
             return {"error": "Invalid year"}, 400
-
-        # Get top tracks for the year
-        results = sp.search(
-            q=f"year:{year}",
-            type='track',
-            limit=50,
-            market='US'
-        )
-        tracks = results['tracks']['items']
-        if not tracks:
+        market = (market or "").upper()
+        if len(market) != 2 or not market.isalpha():
+            return {"error": "Market must be a two-letter country code"}, 400
+        if size < 1 or size > POOL_SIZE:
+            return {"error": f"Size must be 1-{POOL_SIZE}"}, 400
+
+        user_sp = token_store.client_for(user_id)
+        if user_sp is None:
+            return {"error": "Spotify account not linked"}, 401
+
+        # Fetch the Spotify profile while sampling the precomputed pool (built on first use).
+        # The pool is sampled on this thread so a first build can fan its searches out to the pool.
+        spotify_user_future = run_async(user_sp.current_user)
+        track_ids = sample_pool(year, market, size)
+        spotify_user = spotify_user_future.result()
+        if not track_ids:
             return {"error": "No tracks found for this year"}, 404
+        uris = [f"spotify:track:{track_id}" for track_id in track_ids]
+        report_progress(50)
 
         # Create playlist
-        playlist_name = f"{year} Time Machine"
+        playlist_name = f"{year} Time Machine" if market == "US" else f"{year} Time Machine ({market})"
         existing = Playlist.query.filter_by(user_id=user_id, name=playlist_name).first()
-        spotify_user_id = sp.current_user()['id']
+        spotify_user_id = spotify_user['id']
 
         if existing:
-            sp.playlist_replace_items(existing.spotify_id, [])
-            sp.playlist_add_items(existing.spotify_id, [t['uri'] for t in tracks])
+            # Replacing takes at most 100 URIs; the rest are appended in batches
+            user_sp.playlist_replace_items(existing.spotify_id, uris[:100])
+            for i in range(100, len(uris), 100):
+                user_sp.playlist_add_items(existing.spotify_id, uris[i:i + 100])
+            db.session.commit()
             return {"message": "Playlist updated", "playlist_id": existing.spotify_id}, 200
         else:
-            playlist = sp.user_playlist_create(
+            playlist = user_sp.user_playlist_create(
                 spotify_user_id,
                 name=playlist_name,
                 public=False,
                 description=f"Top tracks from {year}"
             )
-            sp.playlist_add_items(playlist['id'], [t['uri'] for t in tracks])
+            for i in range(0, len(uris), 100):
+                user_sp.playlist_add_items(playlist['id'], uris[i:i + 100])
             new_playlist = Playlist(
                 user_id=user_id,
                 name=playlist_name,
@@ -637,30 +1066,47 @@ def generate_cultural_time_machine(year):
         return {"error": "Failed to generate playlist"}, 500
 
 
+#  Tracks per text-described playlist
+TEXT_PLAYLIST_SIZE = 20
+
+
 # Add these functions to services.py
-def generate_text_based_playlist(data):
-    """Create playlist from text description"""
+def generate_text_based_playlist(user_id, data):
+    """Create playlist from text description (runs as a job)"""
     try:
-        user_id = get_jwt_identity()
-        if isinstance(user_id, dict):
-            user_id = user_id.get("id")
-        else:
-            user_id = user_id
         description = data.get("description")
 
         if not description:
             return {"error": "Description is required"}, 400
 
-        # Search Spotify for relevant tracks
-        results = sp.search(q=description, type='track', limit=20)
-        if not results['tracks']['items']:
+        user_sp = token_store.client_for(user_id)
+        if user_sp is None:
+            return {"error": "Spotify account not linked"}, 401
+
+        # Rank the cached catalog locally; Spotify only fills what the index cannot
+        track_ids = [track_id for track_id, _ in catalog_search.search(description, TEXT_PLAYLIST_SIZE)]
+        local_matches = len(track_ids)
+        if local_matches < TEXT_PLAYLIST_SIZE:
+            results = sp.search(q=description, type='track', limit=TEXT_PLAYLIST_SIZE)
+            rows = genre_rows(results['tracks']['items'])
+            record_rows(rows)
+            db.session.commit()  # Release SQLite's write lock before progress is written on another connection
+            catalog_search.add_rows(rows)
+            for row in rows:
+                if len(track_ids) >= TEXT_PLAYLIST_SIZE:
+                    break
+                if row['spotify_track_id'] not in track_ids:
+                    track_ids.append(row['spotify_track_id'])
+
+        if not track_ids:
             return {"error": "No tracks found matching description"}, 404
 
-        track_uris = [track['uri'] for track in results['tracks']['items']]
+        track_uris = [f"spotify:track:{track_id}" for track_id in track_ids]
+        report_progress(40)
 
         # Create Spotify playlist
-        spotify_user = sp.current_user()
-        playlist = sp.user_playlist_create(
+        spotify_user = user_sp.current_user()
+        playlist = user_sp.user_playlist_create(
             user=spotify_user['id'],
             name=f"Generated: {description[:50]}",
             public=False,
@@ -668,7 +1114,7 @@ def generate_text_based_playlist(data):
         )
 
         # Add tracks to playlist
-        sp.playlist_add_items(playlist['id'], track_uris)
+        user_sp.playlist_add_items(playlist['id'], track_uris)
 
         # Save to local database
         new_playlist = Playlist(
@@ -679,7 +1125,11 @@ def generate_text_based_playlist(data):
         db.session.add(new_playlist)
         db.session.commit()
 
-        return {"message": "Playlist created", "playlist": playlist_schema.dump(new_playlist)}, 201
+        return {
+            "message": "Playlist created",
+            "playlist": playlist_schema.dump(new_playlist),
+            "local_matches": local_matches
+        }, 201
 
     except SpotifyException as e:
         return {"error": f"Spotify API error: {str(e)}"}, e.http_status
@@ -688,56 +1138,96 @@ def generate_text_based_playlist(data):
         return {"error": "Failed to create playlist"}, 500
 
 
-def merge_playlists(data):
-    """Merge two playlists into one"""
+#  Most source playlists one merge may read
+MAX_MERGE_SOURCES = 20
+
+
+def _parse_playlist_id(value):
+    """Return value as a playlist ID (ints and digit strings like "12"), or None."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str) and value.strip().isdecimal():
+        return int(value)
+    return None
+
+
+def merge_playlists(user_id, data):
+    """Merge several playlists into a new one, streaming pages into Spotify (runs as a job)"""
     try:
-        user_id = get_jwt_identity()
-        if isinstance(user_id, dict):
-            user_id = user_id.get("id")
-        else:
-            user_id = user_id
-        playlist1_id = data.get("playlist1_id")
-        playlist2_id = data.get("playlist2_id")
-
-        if not playlist1_id or not playlist2_id:
-            return {"error": "Both playlist IDs are required"}, 400
-
-        # Verify ownership and get Spotify IDs
-        playlist1 = Playlist.query.filter_by(user_id=user_id, id=playlist1_id).first()
-        playlist2 = Playlist.query.filter_by(user_id=user_id, id=playlist2_id).first()
-
-        if not playlist1 or not playlist2:
-            return {"error": "One or both playlists not found"}, 404
-
-        if not playlist1.spotify_id or not playlist2.spotify_id:
-            return {"error": "Both playlists must have Spotify IDs"}, 400
-
-        # Get all tracks from both playlists
-        def get_all_tracks(playlist_id):
-            tracks = []
-            results = sp.playlist_tracks(playlist_id)
-            tracks.extend(results['items'])
-            while results['next']:
-                results = sp.next(results)
-                tracks.extend(results['items'])
-            return list(set([item['track']['uri'] for item in tracks]))
-
-        tracks1 = get_all_tracks(playlist1.spotify_id)
-        tracks2 = get_all_tracks(playlist2.spotify_id)
-        combined = list(set(tracks1 + tracks2))
-
-        # Create new playlist
-        spotify_user = sp.current_user()
-        new_playlist = sp.user_playlist_create(
+        playlist_ids = data.get("playlist_ids") or [
+            pid for pid in (data.get("playlist1_id"), data.get("playlist2_id")) if pid
+        ]
+        strategy = data.get("strategy", "concatenate")
+
+        if not isinstance(playlist_ids, list):
+            return {"error": "playlist_ids must be a list of playlist IDs"}, 400
+        if len(playlist_ids) > MAX_MERGE_SOURCES:
+            return {"error": f"At most {MAX_MERGE_SOURCES} playlists can be merged"}, 400
+        playlist_ids = [_parse_playlist_id(pid) for pid in playlist_ids]
+        if None in playlist_ids:
+            return {"error": "Playlist IDs must be integers"}, 400
+        playlist_ids = list(dict.fromkeys(playlist_ids))
+
+        if len(playlist_ids) < 2:
+            return {"error": "At least two playlist IDs are required"}, 400
+        if strategy not in MERGE_STRATEGIES:
+            return {"error": f"Strategy must be one of: {', '.join(MERGE_STRATEGIES)}"}, 400
+
+        # Verify ownership and get Spotify IDs, keeping the requested order
+        owned = {
+            playlist.id: playlist
+            for playlist in Playlist.query.filter(Playlist.user_id == user_id, Playlist.id.in_(playlist_ids))
+        }
+        playlists = [owned.get(pid) for pid in playlist_ids]
+
+        if not all(playlists):
+            return {"error": "One or more playlists not found"}, 404
+
+        if not all(playlist.spotify_id for playlist in playlists):
+            return {"error": "All playlists must have Spotify IDs"}, 400
+
+        user_sp = token_store.client_for(user_id)
+        if user_sp is None:
+            return {"error": "Spotify account not linked"}, 401
+
+        ratings = {}
+        if strategy == "rating":
+            ratings = dict(
+                db.session.query(UserRating.spotify_track_id, UserRating.rating).filter_by(user_id=user_id)
+            )
+
+        # Profile lookup overlaps with the first page of every source (totals drive progress)
+        spotify_user_future = run_async(user_sp.current_user)
+        first_pages = fetch_first_pages(user_sp, [p.spotify_id for p in playlists], item_fields="track(id)")
+        spotify_user = spotify_user_future.result()
+        total = sum(page["total"] for page in first_pages) or 1
+
+        names = " + ".join(playlist.name for playlist in playlists)
+        new_playlist = user_sp.user_playlist_create(
             user=spotify_user['id'],
-            name=f"Merge: {playlist1.name} + {playlist2.name}",
+            name=f"Merge: {names}"[:120],
             public=False,
-            description=f"Combined playlist from {playlist1.name} and {playlist2.name}"
+            description=f"Combined playlist from {names}"[:300]
         )
+        report_progress(5)
+
+        # Stream pages from every source into 100-URI add batches
+        sources = [
+            stream_playlist_items(user_sp, playlist.spotify_id, item_fields="track(id)", first_page=page)
+            for playlist, page in zip(playlists, first_pages)
+        ]
+        read = 0
 
-        # Add tracks in batches
-        for i in range(0, len(combined), 100):
-            sp.playlist_add_items(new_playlist['id'], combined[i:i + 100])
+        def on_track():
+            nonlocal read
+            read += 1
+            if read % 500 == 0:
+                report_progress(5 + 90 * min(read, total) // total)
+
+        writer = PlaylistWriter(user_sp, new_playlist['id'])
+        written = write_merge(writer, merge_track_ids(sources, strategy), strategy, ratings, on_track)
 
         # Save to database
         merged_playlist = Playlist(
@@ -748,7 +1238,12 @@ def merge_playlists(data):
         db.session.add(merged_playlist)
         db.session.commit()
 
-        return {"message": "Playlists merged", "playlist": playlist_schema.dump(merged_playlist)}, 201
+        return {
+            "message": "Playlists merged",
+            "playlist": playlist_schema.dump(merged_playlist),
+            "strategy": strategy,
+            "tracks_added": written
+        }, 201
 
     except SpotifyException as e:
         return {"error": f"Spotify API error: {str(e)}"}, e.http_status
@@ -757,22 +1252,112 @@ def merge_playlists(data):
         return {"error": "Failed to merge playlists"}, 500
 
 
-def get_user_comments():
-    """Retrieve all comments made by the authenticated user"""
+def get_user_comments(cursor=None, limit=None):
+    """Retrieve a page of comments made by the authenticated user"""
     try:
         user_id = get_jwt_identity()
         if isinstance(user_id, dict):
             user_id = user_id.get("id")
         else:
             user_id = user_id
-        # Get comments ordered by creation date (newest first)
-        comments = TrackComment.query.filter_by(user_id=user_id) \
-            .order_by(TrackComment.created_at.desc()).all()
+        # Get comments newest first (ids follow creation order)
+        comments, next_cursor = paginate(
+            TrackComment.query.options(
+                joinedload(TrackComment.user), joinedload(TrackComment.track)
+            ).filter_by(user_id=user_id),
+            TrackComment.id, cursor, limit, newest_first=True
+        )
 
         return jsonify({
-            "comments": track_comments_schema.dump(comments)
+            "comments": track_comments_schema.dump(comments),
+            "next_cursor": next_cursor
         }), 200
 
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         logger.error(f"Failed to fetch user comments: {str(e)}")
-        return jsonify({"error": "Failed to retrieve comments", "details": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": "Failed to retrieve comments", "details": str(e)}), 500
+
+
+def get_job_status(job_id):
+    """Report progress and result of a background playlist job"""
+    user_id = get_jwt_identity()
+    if isinstance(user_id, dict):
+        user_id = user_id.get("id")
+    else:
+        user_id = user_id
+    job = Job.query.filter_by(id=job_id, user_id=user_id).first()
+
+    if not job:
+        return jsonify({"error": "Job not found"}), 404
+
+    return jsonify({"job": job_schema.dump(job)}), 200
+
+
+def get_recommendations(limit=None):
+    """Recommend unrated tracks from the item-item model (no Spotify calls)"""
+    user_id = get_jwt_identity()
+    if isinstance(user_id, dict):
+        user_id = user_id.get("id")
+    else:
+        user_id = user_id
+
+    try:
+        limit = parse_limit(limit)
+    except PaginationError as e:
+        return jsonify({"error": str(e)}), 400
+
+    scored = recommender.recommend(int(user_id), limit)
+    catalog = {
+        row.spotify_track_id: row
+        for row in CatalogTrack.query.filter(CatalogTrack.spotify_track_id.in_([tid for tid, _ in scored]))
+    } if scored else {}
+
+    return jsonify({
+        "recommendations": [
+            {
+                "spotify_track_id": track_id,
+                "score": score,
+                "name": catalog[track_id].name if track_id in catalog else None,
+                "artist": catalog[track_id].artist if track_id in catalog else None,
+                "album": catalog[track_id].album if track_id in catalog else None,
+                "uri": f"spotify:track:{track_id}"
+            }
+            for track_id, score in scored
+        ]
+    }), 200
+
+
+def generate_recommended_playlist(user_id, data):
+    """Create a Spotify playlist from the user's recommendations (runs as a job)"""
+    try:
+        limit = parse_limit((data or {}).get("limit"))
+    except PaginationError as e:
+        return {"error": str(e)}, 400
+
+    try:
+        scored = recommender.recommend(user_id, limit)
+        if not scored:
+            return {"error": "No recommendations yet, rate a few tracks first"}, 404
+        report_progress(30)
+
+        user_sp = token_store.client_for(user_id)
+        if user_sp is None:
+            return {"error": "Spotify account not linked"}, 401
+
+        me = user_sp.me()
+        playlist = user_sp.user_playlist_create(
+            user=me['id'],
+            name=(data or {}).get("name") or f"Recommended {datetime.now().strftime('%Y-%m-%d')}",
+            public=False,
+            description="Tracks similar to the ones you rated highly"
+        )
+        user_sp.playlist_add_items(playlist['id'], [f"spotify:track:{track_id}" for track_id, _ in scored])
+
+        return {
+            "playlist_url": playlist['external_urls']['spotify'],
+            "tracks_added": len(scored)
+        }, 201
+    except SpotifyException as e:
+        return {"error": f"Spotify API error: {str(e)}"}, e.http_status
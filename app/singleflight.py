@@ -0,0 +1,126 @@
+import json
+import logging
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+#  KEYS: lock. ARGV: owner token. Deletes the lock only if this caller still owns it.
+_RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end
+return 0
+"""
+
+
+def make_key(method, *args, **kwargs):
+    """Key a call by method plus normalized arguments (strings trimmed and case-folded, kwargs sorted)."""
+    def normalize(value):
+        if isinstance(value, str):
+            return " ".join(value.split()).casefold()
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        return value
+
+    return f"{method}:" + json.dumps(
+        [normalize(list(args)), {k: normalize(v) for k, v in sorted(kwargs.items())}],
+        separators=(",", ":"),
+        default=str
+    )
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapse concurrent identical calls so only one of them runs.
+
+    In a process, callers with the same key share the leader's result or
+    exception. Callers that pass `lookup` also coordinate across processes.
+    The leader takes a short Redis lock, and leaders elsewhere poll
+    lookup() (normally a shared cache read) until the value appears or the
+    lock expires. An error is shared only within its process. Callers in
+    other processes try again themselves once the lock is gone.
+    """
+
+    def __init__(self, name, redis_client=None, lock_ttl=5.0, poll_interval=0.05):
+        self.name = name
+        self.redis = redis_client
+        self.lock_ttl = lock_ttl
+        self.poll_interval = poll_interval
+        self._release_script = redis_client.register_script(_RELEASE_SCRIPT) if redis_client else None
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.leaders = 0
+        self.shared = 0
+        self.remote_waits = 0
+
+    def do(self, key, fn, lookup=None):
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.leaders += 1
+            else:
+                self.shared += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = self._lead(key, fn, lookup)
+            return flight.result
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def _lead(self, key, fn, lookup):
+        if self.redis is None or lookup is None:
+            return fn()
+
+        lock_key = f"singleflight:{self.name}:{key}"
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_ttl
+        try:
+            while not self.redis.set(lock_key, token, nx=True, px=int(self.lock_ttl * 1000)):
+                # Another process is fetching: wait for it to publish, or for its lock to lapse
+                self.remote_waits += 1
+                time.sleep(self.poll_interval)
+                value = lookup()
+                if value is not None:
+                    return value
+                if time.monotonic() > deadline:
+                    return fn()
+        except Exception as e:
+            logger.warning(f"Redis singleflight unavailable for {self.name}, deduplicating in-process only: {str(e)}")
+            return fn()
+
+        try:
+            value = lookup()  # The previous holder may have published just before releasing
+            return value if value is not None else fn()
+        finally:
+            try:
+                self._release_script(keys=[lock_key], args=[token])
+            except Exception as e:
+                logger.warning(f"Redis singleflight release failed for {self.name}: {str(e)}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "leaders": self.leaders,
+                "shared": self.shared,
+                "remote_waits": self.remote_waits,
+                "in_flight": len(self._flights)
+            }
@@ -0,0 +1,62 @@
+from sqlalchemy.types import TypeDecorator, LargeBinary
+
+#  Spotify's base62 alphabet; IDs are 22 characters encoding a 128-bit value
+BASE62 = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+ID_LENGTH = 22
+_DIGITS = {char: value for value, char in enumerate(BASE62)}
+
+
+def id_to_int(spotify_id):
+    """Decode a 22-character base62 Spotify ID to its 128-bit integer."""
+    if not isinstance(spotify_id, str) or len(spotify_id) != ID_LENGTH:
+        raise ValueError(f"Invalid Spotify ID: {spotify_id!r}")
+    value = 0
+    for char in spotify_id:
+        digit = _DIGITS.get(char)
+        if digit is None:
+            raise ValueError(f"Invalid Spotify ID: {spotify_id!r}")
+        value = value * 62 + digit
+    if value >> 128:
+        raise ValueError(f"Spotify ID out of 128-bit range: {spotify_id!r}")
+    return value
+
+
+def int_to_id(value):
+    """Encode a 128-bit integer as a zero-padded 22-character base62 Spotify ID."""
+    chars = []
+    for _ in range(ID_LENGTH):
+        value, digit = divmod(value, 62)
+        chars.append(BASE62[digit])
+    return "".join(reversed(chars))
+
+
+def id_to_bytes(spotify_id):
+    return id_to_int(spotify_id).to_bytes(16, "big")
+
+
+def bytes_to_id(raw):
+    return int_to_id(int.from_bytes(raw, "big"))
+
+
+def is_valid_spotify_id(spotify_id):
+    try:
+        id_to_int(spotify_id)
+        return True
+    except ValueError:
+        return False
+
+
+class SpotifyID(TypeDecorator):
+    """Stores a base62 Spotify ID as 16 raw bytes; models and queries keep using the string form."""
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or isinstance(value, bytes):
+            return value
+        return id_to_bytes(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return bytes_to_id(bytes(value))
@@ -0,0 +1,78 @@
+from functools import partial
+
+from app.concurrency import fan_out, run_async
+
+#  Spotify's maximum page size for playlist items
+PAGE_SIZE = 100
+
+
+def _playlist_page(client, playlist_id, fields, offset, page_size):
+    return client.playlist_items(
+        playlist_id,
+        fields=fields,
+        limit=page_size,
+        offset=offset,
+        additional_types=("track",)
+    )
+
+
+def fetch_first_pages(client, playlist_ids, item_fields="track(uri)", page_size=PAGE_SIZE):
+    """Fetch the first page (with `total`) of several playlists in parallel."""
+    fields = f"total,items({item_fields})"
+    return fan_out(*[
+        partial(_playlist_page, client, playlist_id, fields, 0, page_size)
+        for playlist_id in playlist_ids
+    ])
+
+
+def fetch_playlists_items(client, playlist_ids, item_fields="track(uri)", page_size=PAGE_SIZE):
+    """Fetch every item of several playlists in two parallel rounds.
+
+    The first pages of all playlists are read together to learn each `total`,
+    then every remaining offset is fetched concurrently. `item_fields` is a
+    Spotify `fields=` projection applied to each item so only the needed
+    attributes come over the wire. Returns one item list per playlist, in order.
+    """
+    fields = f"total,items({item_fields})"
+    first_pages = fetch_first_pages(client, playlist_ids, item_fields, page_size)
+
+    remaining = [
+        (index, offset)
+        for index, page in enumerate(first_pages)
+        for offset in range(page_size, page["total"], page_size)
+    ]
+    pages = fan_out(*[
+        partial(_playlist_page, client, playlist_ids[index], fields, offset, page_size)
+        for index, offset in remaining
+    ])
+
+    items = [list(page["items"]) for page in first_pages]
+    for (index, _), page in zip(remaining, pages):  # Offsets are ascending, so order is kept
+        items[index].extend(page["items"])
+    return items
+
+
+def fetch_playlist_items(client, playlist_id, item_fields="track(uri)", page_size=PAGE_SIZE):
+    """Fetch every item of one playlist with parallel offset paging and a field projection."""
+    return fetch_playlists_items(client, [playlist_id], item_fields, page_size)[0]
+
+
+def stream_playlist_items(client, playlist_id, item_fields="track(uri)", page_size=PAGE_SIZE, first_page=None):
+    """Yield a playlist's items one page at a time, in order.
+
+    The next page is requested while the caller works on the current one, so
+    reads overlap with the caller's work while at most two pages are held.
+    Pass `first_page` when it was already fetched with fetch_first_pages.
+    """
+    fields = f"total,items({item_fields})"
+    page = first_page or _playlist_page(client, playlist_id, fields, 0, page_size)
+    offset = page_size
+    while True:
+        upcoming = None
+        if offset < page["total"]:
+            upcoming = run_async(partial(_playlist_page, client, playlist_id, fields, offset, page_size))
+            offset += page_size
+        yield page["items"]
+        if upcoming is None:
+            return
+        page = upcoming.result()
@@ -1,9 +1,20 @@
 from datetime import datetime
+import logging
 import spotipy
 
 from flask import jsonify, request
 
-from app.extensions import sp, sp_oauth  # Changed import source
+from app.catalog import remember_tracks
+from app.extensions import sp, sp_oauth, catalog_cache, resolution_cache, track_loader, album_loader, \
+    rate_scheduler, concurrency_limiter, spotify_flights, spotify_breaker  # Changed import source
+from app.singleflight import make_key
+from app.circuit import CircuitOpenError, is_unavailable
+from app.degraded import local_track, local_album, local_search
+from app.trending import trending_feed, PLAYLIST_IDS
+from app.jobs import job_queue
+
+logger = logging.getLogger(__name__)
+
 #  Load environment variables
 
 
@@ -18,92 +29,139 @@ else:
 
 
 
-#  Set Album ID for Trending Tracks
-PLAYLIST_ID = "2PvZKuj3e0FPqDHNUCZCSv"  # Replace with your desired album
-# print(sp.playlist(PLAYLIST_ID))  # Check if this returns valid data
+#  Cache lifetimes (seconds) per catalog resource
+TRACK_CACHE_TTL = 24 * 60 * 60  # Track metadata almost never changes
+ALBUM_CACHE_TTL = 24 * 60 * 60
+SEARCH_CACHE_TTL = 60 * 60  # Search rankings drift, keep them shorter
+
+
 
+def _read_through(key, fetch, ttl, fallback):
+    """Fetch through the catalog cache, returning (value, stale).
+
+    While Spotify is unavailable the value comes from the expired cache entry
+    or, failing that, from fallback() (local catalog data), marked stale.
+    """
+    try:
+        return catalog_cache.get_or_fetch(key, fetch, ttl), False
+    except Exception as e:
+        if not is_unavailable(e):
+            raise
+        value = catalog_cache.get_stale(key)
+        if value is None:
+            value = fallback()
+        if value is None:
+            raise
+        logger.warning(f"Spotify unavailable, serving stale data for {key}: {str(e)}")
+        return value, True
+
+
+def _read_failed(message, e):
+    """Error response for a read; 503 with Retry-After while the circuit breaker is open."""
+    if isinstance(e, CircuitOpenError):
+        return jsonify({"error": message, "details": "Spotify is unavailable and no local copy exists"}), 503, \
+            {"Retry-After": str(e.retry_after)}
+    return jsonify({"error": message, "details": str(e)}), 500
 
 
 def search_track_by_artist(artist_name):
     """Search for a track by artist name."""
     try:
-        results = sp.search(q=f"artist:{artist_name}", type="track", limit=10)
+        query = f"artist:{artist_name}"
+        results, stale = _read_through(
+            make_key("search", query, type="track", limit=10),
+            lambda: sp.search(q=query, type="track", limit=10),
+            SEARCH_CACHE_TTL,
+            lambda: local_search(artist=artist_name, limit=10)
+        )
+        if not stale:
+            remember_tracks(results["tracks"]["items"])
         tracks = [
-            {"name": track["name"], "artist": track["artists"][0]["name"], "album": track["album"]["name"]}
+            {
+                "name": track["name"],
+                "artist": track["artists"][0]["name"] if track["artists"] else None,
+                "album": track["album"]["name"]
+            }
             for track in results["tracks"]["items"]
         ]
-        return jsonify({"tracks": tracks}), 200
+        return jsonify({"tracks": tracks, "stale": stale}), 200
     except Exception as e:
-        return jsonify({"error": "Failed to search tracks", "details": str(e)}), 500
+        return _read_failed("Failed to search tracks", e)
 
 def get_track_info(track_id):
     """Fetch detailed track information by track ID."""
     try:
-        track = sp.track(track_id)
+        track, stale = _read_through(
+            f"track:{track_id}", lambda: track_loader.load(track_id), TRACK_CACHE_TTL,
+            lambda: local_track(track_id)
+        )
+        if not stale:
+            remember_tracks([track])
         return jsonify({
             "name": track["name"],
-            "artist": track["artists"][0]["name"],
+            "artist": track["artists"][0]["name"] if track["artists"] else None,
             "album": track["album"]["name"],
-            "release_date": track["album"]["release_date"]
+            "release_date": track["album"]["release_date"],
+            "stale": stale
         }), 200
     except Exception as e:
-        return jsonify({"error": "Failed to fetch track info", "details": str(e)}), 500
+        return _read_failed("Failed to fetch track info", e)
 
 def get_album_info(album_id):
     """Fetch information about an album including tracks and release year."""
     try:
-        album = sp.album(album_id)
+        album, stale = _read_through(
+            f"album:{album_id}", lambda: album_loader.load(album_id), ALBUM_CACHE_TTL,
+            lambda: local_album(album_id)
+        )
+        if not stale:
+            remember_tracks(album["tracks"]["items"], album=album)
         tracks = [{"name": track["name"], "track_number": track["track_number"]} for track in album["tracks"]["items"]]
         return jsonify({
             "album_name": album["name"],
-            "artist": album["artists"][0]["name"],
+            "artist": album["artists"][0]["name"] if album["artists"] else None,
             "release_date": album["release_date"],
-            "cover_art": album["images"][0]["url"],
-            "tracks": tracks
+            "cover_art": album["images"][0]["url"] if album["images"] else None,
+            "tracks": tracks,
+            "stale": stale
         }), 200
     except Exception as e:
-        return jsonify({"error": "Failed to fetch album info", "details": str(e)}), 500
-
+        return _read_failed("Failed to fetch album info", e)
 
-def fetch_trending_tracks():
-    """Fetch top 10 tracks from the Global Top 50 playlist."""
-    try:
-        print(f"🔍 Checking if playlist ID {PLAYLIST_ID} is valid...")
 
-        #  Check if the playlist exists before fetching tracks
-        playlist_info = sp.playlist(PLAYLIST_ID)
-        if not playlist_info:
-            print(" Playlist not found. Double-check the playlist ID.")
-            return jsonify({"error": "Playlist not found"}), 404
+def fetch_trending_tracks(params):
+    """Serve a page of the in-memory trending snapshot (refreshed in the background)."""
+    playlist_id = params.get('playlist') or PLAYLIST_IDS[0]
+    if playlist_id not in PLAYLIST_IDS:
+        return jsonify({"error": "Unknown trending playlist", "available": PLAYLIST_IDS}), 404
 
-        print(f" Playlist '{playlist_info['name']}' found!")
-
-        #  Fetch playlist tracks (Limit to 10, No `market` filter)
-        playlist_tracks = sp.playlist_tracks(PLAYLIST_ID, limit=10)
-
-        print(" Spotify API Response (Playlist Tracks):", playlist_tracks)  # Debugging
-
-        #  Extract track data
-        tracks = [
-            {
-                "name": track["track"]["name"],
-                "artist": track["track"]["artists"][0]["name"],
-                "album": track["track"]["album"]["name"]
-            }
-            for track in playlist_tracks["items"] if track["track"]
-        ]
-
-        print(" Trending tracks fetched successfully!")  # Debugging
-        return jsonify({"trending_tracks": tracks}), 200
+    try:
+        limit = int(params.get('limit', 10))
+        offset = int(params.get('offset', 0))
+    except ValueError:
+        return jsonify({"error": "Invalid limit or offset value"}), 400
+    if not (1 <= limit <= 100) or offset < 0:
+        return jsonify({"error": "Limit must be 1-100 and offset must not be negative"}), 400
 
+    try:
+        snapshot = trending_feed.get(playlist_id)
     except spotipy.exceptions.SpotifyException as e:
-        print(f" Spotify API Error: {str(e)}")  # Debugging
         return jsonify({"error": "Failed to fetch trending tracks from Spotify", "details": str(e)}), e.http_status
-
     except Exception as e:
-        print(f" General Error fetching trending tracks: {str(e)}")  # Debugging
+        logger.error(f"Error fetching trending tracks: {str(e)}")
         return jsonify({"error": "Unexpected error occurred", "details": str(e)}), 500
 
+    return jsonify({
+        "trending_tracks": snapshot["tracks"][offset:offset + limit],
+        "total": len(snapshot["tracks"]),
+        "limit": limit,
+        "offset": offset,
+        "playlist_id": playlist_id,
+        "snapshot_id": snapshot["snapshot_id"],
+        "refreshed_at": snapshot["refreshed_at"],
+        "stale": trending_feed.is_stale(snapshot)
+    }), 200
+
 
 
 def advanced_track_search(params):
@@ -145,7 +203,15 @@ def advanced_track_search(params):
             return jsonify({"error": "At least one filter required"}), 400
 
         # Spotify API call
-        results = sp.search(q=' '.join(query_parts), type='track', limit=limit)
+        query = ' '.join(query_parts)
+        results, stale = _read_through(
+            make_key("search", query, type="track", limit=limit),
+            lambda: sp.search(q=query, type='track', limit=limit),
+            SEARCH_CACHE_TTL,
+            lambda: local_search(artist=artist, year=year, genre=genre, limit=limit)
+        )
+        if not stale:
+            remember_tracks(results['tracks']['items'])
         tracks = [{
             'name': track['name'],
             'artists': [a['name'] for a in track['artists']],
@@ -159,8 +225,24 @@ def advanced_track_search(params):
 
         return jsonify({
             'tracks': tracks,
-            'total': results['tracks']['total']
+            'total': results['tracks']['total'],
+            'stale': stale
         }), 200
 
     except Exception as e:
-        return jsonify({"error": "Search failed", "details": str(e)}), 500
+        return _read_failed("Search failed", e)
+
+
+def get_cache_stats():
+    """Report counters for the Spotify caches, batch loaders, rate scheduler, limiter and circuit breaker."""
+    return jsonify({
+        "catalog_cache": catalog_cache.stats(),
+        "resolution_cache": resolution_cache.stats(),
+        "track_loader": track_loader.stats(),
+        "album_loader": album_loader.stats(),
+        "rate_scheduler": rate_scheduler.stats(),
+        "concurrency_limiter": concurrency_limiter.stats(),
+        "singleflight": spotify_flights.stats(),
+        "circuit_breaker": spotify_breaker.stats(),
+        "deferred_jobs": job_queue.deferred_count()
+    }), 200
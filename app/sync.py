@@ -0,0 +1,96 @@
+import logging
+
+from app import db
+from app.models import Track
+from app.catalog import record_tracks
+from app.spotify_paging import fetch_playlist_items
+
+logger = logging.getLogger(__name__)
+
+#  Spotify accepts at most 100 URIs per add call
+ADD_BATCH_SIZE = 100
+
+
+def sync_playlist(client, playlist):
+    """Reconcile a local playlist and its Spotify copy using the playlist snapshot_id.
+
+    - Snapshot unchanged: Spotify has not changed since the last sync, so only
+      local tracks that were never pushed (synced=False) are sent.
+    - Snapshot changed: the remote items are read once (projected, parallel
+      pages) and diffed by track ID. Tracks added on Spotify are inserted
+      locally. Previously synced tracks that disappeared from Spotify are
+      deleted locally. Unpushed local tracks are added to Spotify in batches.
+
+    Returns a summary dict. The caller's session is committed.
+    """
+    snapshot_id = client.playlist(playlist.spotify_id, fields="snapshot_id")["snapshot_id"]
+    local_tracks = Track.query.filter_by(playlist_id=playlist.id).all()
+    pending = [track for track in local_tracks if not track.synced]
+    summary = {
+        "snapshot_changed": snapshot_id != playlist.snapshot_id,
+        "added_locally": 0,
+        "removed_locally": 0,
+        "added_to_spotify": 0,
+        "skipped": []
+    }
+
+    if summary["snapshot_changed"]:
+        items = fetch_playlist_items(
+            client,
+            playlist.spotify_id,
+            item_fields="track(id,name,popularity,duration_ms,artists(name),album(id,name,release_date))"
+        )
+        remote = {}
+        for item in items:
+            track = item.get("track")
+            if track and track.get("id"):
+                remote.setdefault(track["id"], track)
+
+        local_ids = {track.spotify_track_id for track in local_tracks}
+        local_names = {track.name for track in local_tracks}
+
+        # Previously synced tracks missing remotely were removed on Spotify
+        for track in local_tracks:
+            if track.synced and track.spotify_track_id not in remote:
+                db.session.delete(track)
+                local_names.discard(track.name)
+                summary["removed_locally"] += 1
+
+        # Refresh shared metadata; new local rows below reference these catalog rows
+        record_tracks(remote.values())
+
+        # Tracks added on Spotify since the last sync
+        for track_id in remote.keys() - local_ids:
+            remote_track = remote[track_id]
+            if remote_track["name"] in local_names:
+                summary["skipped"].append(remote_track["name"])  # Name already used in this playlist
+                continue
+            db.session.add(Track(
+                name=remote_track["name"],
+                artist=remote_track["artists"][0]["name"] if remote_track["artists"] else "Unknown",
+                album=remote_track["album"]["name"] if remote_track.get("album") else None,
+                playlist_id=playlist.id,
+                spotify_track_id=track_id,
+                synced=True
+            ))
+            local_names.add(remote_track["name"])
+            summary["added_locally"] += 1
+
+        # Unpushed local tracks that someone already added on Spotify
+        for track in pending:
+            if track.spotify_track_id in remote:
+                track.synced = True
+        pending = [track for track in pending if not track.synced]
+
+    uris = list(dict.fromkeys(f"spotify:track:{track.spotify_track_id}" for track in pending))
+    for i in range(0, len(uris), ADD_BATCH_SIZE):
+        result = client.playlist_add_items(playlist.spotify_id, uris[i:i + ADD_BATCH_SIZE])
+        snapshot_id = result["snapshot_id"]
+    for track in pending:
+        track.synced = True
+    summary["added_to_spotify"] = len(uris)
+
+    playlist.snapshot_id = snapshot_id
+    db.session.commit()
+    logger.info(f"Synced playlist {playlist.id}: {summary}")
+    return summary
@@ -0,0 +1,113 @@
+import logging
+import threading
+import time
+from datetime import datetime
+
+import spotipy
+from sqlalchemy import select, update, insert
+
+from app import db
+from app.models import SpotifyToken
+from app.extensions import sp_oauth, session, SPOTIFY_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+#  Refresh access tokens this many seconds before they expire
+REFRESH_MARGIN = 5 * 60
+
+
+class TokenStore:
+    """Per-user Spotify tokens persisted in the database with a process-local cache."""
+
+    def __init__(self, oauth, refresh_margin=REFRESH_MARGIN):
+        self.oauth = oauth
+        self.refresh_margin = refresh_margin
+        self._tokens = {}  # user_id -> token_info
+        self._refresh_locks = {}  # user_id -> Lock, so one thread refreshes at a time
+        self._lock = threading.Lock()
+
+    def save(self, user_id, token_info):
+        """Persist token_info (as returned by SpotifyOAuth) for user_id."""
+        user_id = int(user_id)
+        values = {
+            "access_token": token_info["access_token"],
+            "refresh_token": token_info["refresh_token"],
+            "expires_at": int(token_info["expires_at"]),
+            "scope": token_info.get("scope"),
+            "updated_at": datetime.utcnow()
+        }
+        # Separate connection so we never commit the caller's pending ORM changes
+        with db.engine.begin() as conn:
+            result = conn.execute(
+                update(SpotifyToken.__table__)
+                .where(SpotifyToken.__table__.c.user_id == user_id)
+                .values(**values)
+            )
+            if result.rowcount == 0:
+                conn.execute(insert(SpotifyToken.__table__).values(user_id=user_id, **values))
+
+        with self._lock:
+            self._tokens[user_id] = dict(token_info, expires_at=values["expires_at"])
+
+    def _load(self, user_id):
+        with db.engine.connect() as conn:
+            row = conn.execute(
+                select(SpotifyToken.__table__).where(SpotifyToken.__table__.c.user_id == user_id)
+            ).mappings().first()
+        if not row:
+            return None
+        return {
+            "access_token": row["access_token"],
+            "refresh_token": row["refresh_token"],
+            "expires_at": row["expires_at"],
+            "scope": row["scope"]
+        }
+
+    def _expires_soon(self, token_info):
+        return token_info["expires_at"] - time.time() < self.refresh_margin
+
+    def get(self, user_id):
+        """Return a valid token_info for user_id, refreshing it ahead of expiry, or None if not linked."""
+        user_id = int(user_id)
+        with self._lock:
+            token_info = self._tokens.get(user_id)
+        if token_info is None:
+            token_info = self._load(user_id)
+            if token_info is None:
+                return None
+            with self._lock:
+                self._tokens[user_id] = token_info
+
+        if not self._expires_soon(token_info):
+            return token_info
+
+        with self._lock:
+            refresh_lock = self._refresh_locks.setdefault(user_id, threading.Lock())
+        with refresh_lock:
+            with self._lock:
+                token_info = self._tokens.get(user_id, token_info)
+            if self._expires_soon(token_info):  # Another thread may have refreshed already
+                logger.info(f"Refreshing Spotify token for user {user_id}")
+                token_info = self.oauth.refresh_access_token(token_info["refresh_token"])
+                self.save(user_id, token_info)
+        return token_info
+
+    def client_for(self, user_id):
+        """Return a Spotify client bound to user_id's token, or None if the user has not linked Spotify."""
+        if not user_id:
+            return None
+        token_info = self.get(user_id)
+        if token_info is None:
+            return None
+        return spotipy.Spotify(
+            auth=token_info["access_token"],
+            requests_session=session,
+            requests_timeout=SPOTIFY_TIMEOUT
+        )
+
+    def forget(self, user_id):
+        with self._lock:
+            self._tokens.pop(int(user_id), None)
+
+
+token_store = TokenStore(sp_oauth)
@@ -0,0 +1,79 @@
+import logging
+import os
+import random
+from datetime import datetime, timedelta
+from functools import partial
+
+from app import db
+from app.models import TrackPool
+from app.extensions import sp
+from app.catalog import record_tracks
+from app.concurrency import fan_out
+from app.scheduler import scheduler
+from app.upsert import upsert
+
+logger = logging.getLogger(__name__)
+
+#  Candidates kept per (year, market); Spotify search pages hold 50 and stop at offset 1000
+POOL_SIZE = min(int(os.getenv("TRACK_POOL_SIZE", "500")), 1000)
+SEARCH_PAGE_SIZE = 50
+#  Results for a past year barely change, so pools are refreshed weekly in the background
+POOL_MAX_AGE = timedelta(days=7)
+REFRESH_CHECK_INTERVAL = 60 * 60
+
+
+def fetch_pool(year, market):
+    """Search every page of year:{year} in parallel and return unique track IDs in Spotify's order."""
+    pages = fan_out(*[
+        partial(sp.search, q=f"year:{year}", type="track", limit=SEARCH_PAGE_SIZE, offset=offset, market=market)
+        for offset in range(0, POOL_SIZE, SEARCH_PAGE_SIZE)
+    ])
+    tracks = {}
+    for page in pages:
+        for track in page["tracks"]["items"]:
+            if track and track.get("id"):
+                tracks.setdefault(track["id"], track)
+    record_tracks(tracks.values())
+    return list(tracks)
+
+
+def refresh_pool(year, market):
+    """Refetch and store the pool for (year, market); commits."""
+    track_ids = fetch_pool(year, market)
+    upsert(
+        TrackPool,
+        {"year": year, "market": market, "track_ids": track_ids, "refreshed_at": datetime.utcnow()},
+        index_elements=["year", "market"],
+        update=["track_ids", "refreshed_at"]
+    )
+    db.session.commit()
+    logger.info(f"Refreshed track pool {year}/{market}: {len(track_ids)} tracks")
+    return track_ids
+
+
+def get_pool(year, market):
+    """Return the stored pool, building it on first use. Stale pools are served until the refresher runs."""
+    pool = TrackPool.query.filter_by(year=year, market=market).first()
+    if pool is None:
+        return refresh_pool(year, market)
+    return pool.track_ids
+
+
+def sample_pool(year, market, size):
+    """Pick up to size random tracks from the pool, kept in the pool's relevance order."""
+    track_ids = get_pool(year, market)
+    if size >= len(track_ids):
+        return list(track_ids)
+    return [track_ids[i] for i in sorted(random.sample(range(len(track_ids)), size))]
+
+
+@scheduler.every(REFRESH_CHECK_INTERVAL)
+def refresh_stale_pools():
+    cutoff = datetime.utcnow() - POOL_MAX_AGE
+    stale = TrackPool.query.filter(TrackPool.refreshed_at < cutoff).all()
+    for pool in stale:
+        try:
+            refresh_pool(pool.year, pool.market)
+        except Exception as e:
+            db.session.rollback()
+            logger.warning(f"Track pool {pool.year}/{pool.market} refresh failed: {str(e)}")
@@ -0,0 +1,134 @@
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from functools import partial
+
+from flask import current_app
+
+from app.extensions import sp, spotify_flights
+from app.catalog import remember_tracks
+from app.concurrency import run_async
+from app.rate_limit import spotify_context, BACKGROUND
+from app.scheduler import scheduler
+from app.singleflight import make_key
+from app.spotify_paging import fetch_playlist_items
+
+logger = logging.getLogger(__name__)
+
+#  Source playlists for trending tracks (comma-separated IDs); the first is the default feed
+DEFAULT_PLAYLIST_ID = "2PvZKuj3e0FPqDHNUCZCSv"
+PLAYLIST_IDS = [
+    playlist_id.strip()
+    for playlist_id in os.getenv("TRENDING_PLAYLISTS", DEFAULT_PLAYLIST_ID).split(",")
+    if playlist_id.strip()
+]
+#  How often snapshots are revalidated, and how soon to retry after Spotify errors
+REFRESH_INTERVAL = int(os.getenv("TRENDING_REFRESH_SECONDS", "300"))
+ERROR_RETRY_INTERVAL = 30
+ITEM_FIELDS = "track(id,name,popularity,duration_ms,artists(name),album(id,name,release_date))"
+
+
+class TrendingFeed:
+    """In-memory trending snapshots, one per source playlist, served stale while they revalidate.
+
+    A refresh reads only the playlist's snapshot_id and refetches the items
+    when it changed. A failed refresh keeps the previous snapshot, so readers
+    keep getting answers while Spotify errors.
+    """
+
+    def __init__(self, playlist_ids, refresh_interval):
+        self.playlist_ids = playlist_ids
+        self.refresh_interval = refresh_interval
+        self._snapshots = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def refresh(self, playlist_id):
+        """Revalidate one snapshot now (concurrent refreshes of a playlist share one)."""
+        return spotify_flights.do(make_key("trending", playlist_id), partial(self._refresh, playlist_id))
+
+    def _refresh(self, playlist_id):
+        current = self._snapshots.get(playlist_id)
+        try:
+            info = sp.playlist(playlist_id, fields="name,snapshot_id")
+            if current and current["snapshot_id"] == info["snapshot_id"]:
+                updated = dict(current, error=None)
+            else:
+                items = fetch_playlist_items(sp, playlist_id, item_fields=ITEM_FIELDS)
+                tracks = [item["track"] for item in items if item.get("track") and item["track"].get("id")]
+                remember_tracks(tracks)
+                updated = {
+                    "playlist_id": playlist_id,
+                    "name": info.get("name"),
+                    "snapshot_id": info["snapshot_id"],
+                    "tracks": [
+                        {
+                            "spotify_track_id": track["id"],
+                            "name": track["name"],
+                            "artist": track["artists"][0]["name"] if track.get("artists") else None,
+                            "album": track["album"]["name"] if track.get("album") else None
+                        }
+                        for track in tracks
+                    ],
+                    "refreshed_at": datetime.utcnow().isoformat(),
+                    "error": None
+                }
+            updated["next_check"] = time.monotonic() + self.refresh_interval
+        except Exception as e:
+            if current is None:
+                raise
+            logger.warning(f"Trending refresh for {playlist_id} failed, serving the previous snapshot: {str(e)}")
+            updated = dict(current, error=str(e), next_check=time.monotonic() + ERROR_RETRY_INTERVAL)
+
+        with self._lock:
+            self._snapshots[playlist_id] = updated
+        return updated
+
+    def _revalidate_in_background(self, playlist_id):
+        with self._lock:
+            if playlist_id in self._refreshing:
+                return
+            self._refreshing.add(playlist_id)
+        app = current_app._get_current_object()
+
+        def run():
+            try:
+                with app.app_context(), spotify_context(BACKGROUND):
+                    self.refresh(playlist_id)
+            except Exception as e:
+                logger.warning(f"Background trending refresh for {playlist_id} failed: {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(playlist_id)
+
+        run_async(run)
+
+    def get(self, playlist_id):
+        """Return the snapshot for playlist_id, fetching it only on a cold start.
+
+        A snapshot past its revalidation time is returned as is while a
+        background refresh runs.
+        """
+        snapshot = self._snapshots.get(playlist_id)
+        if snapshot is None:
+            return self.refresh(playlist_id)
+        if time.monotonic() >= snapshot["next_check"]:
+            self._revalidate_in_background(playlist_id)
+        return snapshot
+
+    def is_stale(self, snapshot):
+        return snapshot["error"] is not None or time.monotonic() >= snapshot["next_check"]
+
+
+trending_feed = TrendingFeed(PLAYLIST_IDS, REFRESH_INTERVAL)
+
+
+@scheduler.every(REFRESH_INTERVAL)
+def refresh_trending():
+    for playlist_id in trending_feed.playlist_ids:
+        try:
+            trending_feed.refresh(playlist_id)
+        except Exception as e:
+            logger.warning(f"Trending refresh for {playlist_id} failed: {str(e)}")
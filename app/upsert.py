@@ -0,0 +1,65 @@
+from sqlalchemy import and_, func, insert, literal, select, update as sql_update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+
+#  Dialects with INSERT ... ON CONFLICT
+ON_CONFLICT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def upsert(model, rows, index_elements, update=(), coalesce=False):
+    """Insert rows (a dict or a list of dicts) for model in the current session (caller commits).
+
+    A row that conflicts on index_elements updates the `update` columns from
+    the new row instead, or is skipped when there are none. With coalesce, a
+    None in the new row keeps the stored value. SQLite and PostgreSQL do this
+    in one INSERT ... ON CONFLICT statement. Other dialects select each row
+    and then update or insert it inside a savepoint, retrying once when a
+    concurrent insert wins the race.
+
+    Returns the number of rows inserted or updated.
+    """
+    rows = [rows] if isinstance(rows, dict) else list(rows)
+    if not rows:
+        return 0
+    dialect = db.session.get_bind().dialect.name
+    if dialect in ON_CONFLICT_INSERTS:
+        return _insert_on_conflict(ON_CONFLICT_INSERTS[dialect], model, rows, index_elements, update, coalesce)
+    try:
+        return _select_then_write(model, rows, index_elements, update, coalesce)
+    except IntegrityError:
+        return _select_then_write(model, rows, index_elements, update, coalesce)
+
+
+def _insert_on_conflict(dialect_insert, model, rows, index_elements, update, coalesce):
+    stmt = dialect_insert(model).values(rows)
+    if not update:
+        return db.session.execute(stmt.on_conflict_do_nothing(index_elements=index_elements)).rowcount
+    table = model.__table__
+    stmt = stmt.on_conflict_do_update(
+        index_elements=index_elements,
+        set_={
+            column: func.coalesce(stmt.excluded[column], table.c[column]) if coalesce else stmt.excluded[column]
+            for column in update
+        }
+    )
+    return db.session.execute(stmt).rowcount
+
+
+def _select_then_write(model, rows, index_elements, update, coalesce):
+    table = model.__table__
+    written = 0
+    with db.session.begin_nested():  # A lost race rolls back to here, not the caller's transaction
+        for row in rows:
+            key = and_(*(table.c[column] == row[column] for column in index_elements))
+            if db.session.execute(select(literal(1)).select_from(table).where(key)).first() is None:
+                written += db.session.execute(insert(table).values(row)).rowcount
+            elif update:
+                values = {
+                    column: func.coalesce(literal(row.get(column), table.c[column].type), table.c[column])
+                    if coalesce else row.get(column)
+                    for column in update
+                }
+                written += db.session.execute(sql_update(table).where(key).values(values)).rowcount
+    return written
@@ -7,3 +7,7 @@ class Config:
     SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
     SQLALCHEMY_DATABASE_URI = os.getenv("DATABASE_URL", "sqlite:///database.db")
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))  # Concurrent background playlist jobs per process
+    RECOMMENDER_SNAPSHOT = os.getenv("RECOMMENDER_SNAPSHOT")  # Defaults to instance/recommender.json.gz
+    SEARCH_INDEX_PATH = os.getenv("SEARCH_INDEX_PATH")  # Defaults to instance/search_index.json.gz
+    SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "true").lower() == "true"  # Periodic refresh tasks
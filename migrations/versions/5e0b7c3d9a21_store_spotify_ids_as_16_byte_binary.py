@@ -0,0 +1,133 @@
+"""Store Spotify IDs as 16-byte binary
+
+Revision ID: 5e0b7c3d9a21
+Revises: f1c8a4d06e93
+Create Date: 2026-10-18 15:03:11.648290
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e0b7c3d9a21'
+down_revision = 'f1c8a4d06e93'
+branch_labels = None
+depends_on = None
+
+BASE62 = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# (table, integer primary key, Spotify ID column); catalog_track is keyed by the ID itself
+ID_COLUMNS = [
+    ('track', 'id', 'spotify_track_id'),
+    ('favorite', 'id', 'spotify_id'),
+    ('user_rating', 'id', 'spotify_track_id'),
+]
+CATALOG_COLUMNS = ['spotify_track_id', 'name', 'artist', 'album', 'album_id',
+                   'release_date', 'popularity', 'duration_ms', 'updated_at']
+
+
+def _to_bytes(spotify_id):
+    if not isinstance(spotify_id, str) or len(spotify_id) != 22 or any(c not in BASE62 for c in spotify_id):
+        raise ValueError(spotify_id)
+    value = 0
+    for char in spotify_id:
+        value = value * 62 + BASE62.index(char)
+    if value >> 128:
+        raise ValueError(spotify_id)
+    return value.to_bytes(16, 'big')
+
+
+def _to_id(raw):
+    value = int.from_bytes(bytes(raw), 'big')
+    chars = []
+    for _ in range(22):
+        value, digit = divmod(value, 62)
+        chars.append(BASE62[digit])
+    return ''.join(reversed(chars))
+
+
+def _catalog_table(id_type=None):
+    return sa.table(
+        'catalog_track',
+        sa.column('spotify_track_id', id_type),
+        *[sa.column(c) for c in CATALOG_COLUMNS[1:-1]],
+        sa.column('updated_at', sa.DateTime)
+    )
+
+
+def _read_all(convert):
+    """Read and convert every stored ID before any column type changes."""
+    conn = op.get_bind()
+    invalid = []
+
+    def checked(table_name, value):
+        try:
+            return convert(value)
+        except ValueError:
+            invalid.append((table_name, value))
+
+    rewrites = {}
+    for table_name, pk, column in ID_COLUMNS:
+        table = sa.table(table_name, sa.column(pk), sa.column(column))
+        rewrites[table_name] = [
+            (row[0], checked(table_name, row[1]))
+            for row in conn.execute(sa.select(table.c[pk], table.c[column]))
+        ]
+
+    catalog = _catalog_table()
+    catalog_rows = []
+    for row in conn.execute(sa.select(*[catalog.c[c] for c in CATALOG_COLUMNS])).mappings():
+        row = dict(row)
+        row['spotify_track_id'] = checked('catalog_track', row['spotify_track_id'])
+        catalog_rows.append(row)
+
+    if invalid:
+        raise RuntimeError(f"Fix or delete rows with malformed Spotify IDs first: {invalid[:20]}")
+    return rewrites, catalog_rows
+
+
+def _write_all(rewrites, catalog_rows, id_type):
+    conn = op.get_bind()
+    for table_name, pk, column in ID_COLUMNS:
+        table = sa.table(table_name, sa.column(pk, sa.Integer), sa.column(column, id_type))
+        for row_pk, value in rewrites[table_name]:
+            conn.execute(table.update().where(table.c[pk] == row_pk).values({column: value}))
+
+    # The ID is catalog_track's primary key, so rewrite the table instead of updating keys in place
+    catalog = _catalog_table(id_type)
+    conn.execute(catalog.delete())
+    if catalog_rows:
+        conn.execute(catalog.insert(), catalog_rows)
+
+
+def _alter_types(from_type, to_type, using):
+    with op.batch_alter_table('track', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_track_catalog', type_='foreignkey')
+
+    for table_name, column in [('catalog_track', 'spotify_track_id')] + [(t, c) for t, _, c in ID_COLUMNS]:
+        with op.batch_alter_table(table_name, schema=None) as batch_op:
+            batch_op.alter_column(column,
+                   existing_type=from_type,
+                   type_=to_type,
+                   existing_nullable=False,
+                   postgresql_using=using.format(column=column))
+
+
+def upgrade():
+    rewrites, catalog_rows = _read_all(_to_bytes)
+    # PostgreSQL needs a cast for the type change; every value is overwritten right after
+    _alter_types(sa.String(length=200), sa.LargeBinary(length=16), "convert_to({column}, 'UTF8')")
+    _write_all(rewrites, catalog_rows, sa.LargeBinary)
+
+    with op.batch_alter_table('track', schema=None) as batch_op:
+        batch_op.create_foreign_key('fk_track_catalog', 'catalog_track', ['spotify_track_id'], ['spotify_track_id'])
+
+
+def downgrade():
+    rewrites, catalog_rows = _read_all(_to_id)
+    _alter_types(sa.LargeBinary(length=16), sa.String(length=200), "encode({column}, 'hex')")
+    _write_all(rewrites, catalog_rows, sa.String)
+
+    with op.batch_alter_table('track', schema=None) as batch_op:
+        batch_op.create_foreign_key('fk_track_catalog', 'catalog_track', ['spotify_track_id'], ['spotify_track_id'])
@@ -0,0 +1,32 @@
+"""Add track_pool table
+
+Revision ID: 8a4f1e6c2d90
+Revises: c7e2a9f4b813
+Create Date: 2026-10-18 17:20:44.031876
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a4f1e6c2d90'
+down_revision = 'c7e2a9f4b813'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('track_pool',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('market', sa.String(length=2), nullable=False),
+    sa.Column('track_ids', sa.JSON(), nullable=False),
+    sa.Column('refreshed_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('year', 'market', name='unique_track_pool_year_market')
+    )
+
+
+def downgrade():
+    op.drop_table('track_pool')
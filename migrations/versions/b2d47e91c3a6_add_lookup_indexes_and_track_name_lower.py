@@ -0,0 +1,49 @@
+"""Add lookup indexes and track name_lower
+
+Revision ID: b2d47e91c3a6
+Revises: 3b9f6d2a8e15
+Create Date: 2026-10-18 13:05:16.420773
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b2d47e91c3a6'
+down_revision = '3b9f6d2a8e15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('track', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('name_lower', sa.String(length=200), nullable=True))
+
+    # Backfill with Python's lower() so it matches what the model writes (SQLite's lower() is ASCII-only)
+    conn = op.get_bind()
+    track = sa.table('track', sa.column('id', sa.Integer), sa.column('name', sa.String), sa.column('name_lower', sa.String))
+    for row in conn.execute(sa.select(track.c.id, track.c.name)).fetchall():
+        conn.execute(track.update().where(track.c.id == row.id).values(name_lower=row.name.lower()))
+
+    with op.batch_alter_table('track', schema=None) as batch_op:
+        batch_op.alter_column('name_lower', existing_type=sa.String(length=200), nullable=False)
+        batch_op.create_index('ix_track_playlist_id_name_lower', ['playlist_id', 'name_lower'], unique=False)
+
+    with op.batch_alter_table('favorite', schema=None) as batch_op:
+        batch_op.create_index('ix_favorite_user_id_spotify_id', ['user_id', 'spotify_id'], unique=False)
+
+    with op.batch_alter_table('user_rating', schema=None) as batch_op:
+        batch_op.create_index('ix_user_rating_user_id_spotify_track_id', ['user_id', 'spotify_track_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_rating', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_rating_user_id_spotify_track_id')
+
+    with op.batch_alter_table('favorite', schema=None) as batch_op:
+        batch_op.drop_index('ix_favorite_user_id_spotify_id')
+
+    with op.batch_alter_table('track', schema=None) as batch_op:
+        batch_op.drop_index('ix_track_playlist_id_name_lower')
+        batch_op.drop_column('name_lower')
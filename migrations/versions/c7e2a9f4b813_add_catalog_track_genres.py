@@ -0,0 +1,28 @@
+"""Add genres to catalog_track and index updated_at
+
+Revision ID: c7e2a9f4b813
+Revises: 5e0b7c3d9a21
+Create Date: 2026-10-18 16:41:09.512337
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e2a9f4b813'
+down_revision = '5e0b7c3d9a21'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('catalog_track', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('genres', sa.String(length=500), nullable=True))
+        batch_op.create_index(batch_op.f('ix_catalog_track_updated_at'), ['updated_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('catalog_track', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_catalog_track_updated_at'))
+        batch_op.drop_column('genres')
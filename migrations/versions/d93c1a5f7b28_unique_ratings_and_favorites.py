@@ -0,0 +1,48 @@
+"""Unique ratings and favorites per user
+
+Revision ID: d93c1a5f7b28
+Revises: b2d47e91c3a6
+Create Date: 2026-10-18 13:40:02.871354
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd93c1a5f7b28'
+down_revision = 'b2d47e91c3a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Dedup before adding the constraints: keep the latest rating and the earliest favorite
+    op.execute("""
+        DELETE FROM user_rating WHERE id NOT IN (
+            SELECT MAX(id) FROM user_rating GROUP BY user_id, spotify_track_id
+        )
+    """)
+    op.execute("""
+        DELETE FROM favorite WHERE id NOT IN (
+            SELECT MIN(id) FROM favorite GROUP BY user_id, spotify_id
+        )
+    """)
+
+    with op.batch_alter_table('user_rating', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_rating_user_id_spotify_track_id')
+        batch_op.create_unique_constraint('unique_rating_per_user_track', ['user_id', 'spotify_track_id'])
+
+    with op.batch_alter_table('favorite', schema=None) as batch_op:
+        batch_op.drop_index('ix_favorite_user_id_spotify_id')
+        batch_op.create_unique_constraint('unique_favorite_per_user', ['user_id', 'spotify_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('favorite', schema=None) as batch_op:
+        batch_op.drop_constraint('unique_favorite_per_user', type_='unique')
+        batch_op.create_index('ix_favorite_user_id_spotify_id', ['user_id', 'spotify_id'], unique=False)
+
+    with op.batch_alter_table('user_rating', schema=None) as batch_op:
+        batch_op.drop_constraint('unique_rating_per_user_track', type_='unique')
+        batch_op.create_index('ix_user_rating_user_id_spotify_track_id', ['user_id', 'spotify_track_id'], unique=False)
@@ -0,0 +1,48 @@
+"""Add catalog_track table referenced by track
+
+Revision ID: f1c8a4d06e93
+Revises: d93c1a5f7b28
+Create Date: 2026-10-18 14:22:47.305128
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1c8a4d06e93'
+down_revision = 'd93c1a5f7b28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('catalog_track',
+    sa.Column('spotify_track_id', sa.String(length=200), nullable=False),
+    sa.Column('name', sa.String(length=200), nullable=False),
+    sa.Column('artist', sa.String(length=200), nullable=True),
+    sa.Column('album', sa.String(length=200), nullable=True),
+    sa.Column('album_id', sa.String(length=100), nullable=True),
+    sa.Column('release_date', sa.String(length=20), nullable=True),
+    sa.Column('popularity', sa.Integer(), nullable=True),
+    sa.Column('duration_ms', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('spotify_track_id')
+    )
+
+    # Seed the catalog from existing tracks so every track row has something to reference
+    op.execute("""
+        INSERT INTO catalog_track (spotify_track_id, name, artist, album, updated_at)
+        SELECT spotify_track_id, MIN(name), MIN(artist), MIN(album), CURRENT_TIMESTAMP
+        FROM track GROUP BY spotify_track_id
+    """)
+
+    with op.batch_alter_table('track', schema=None) as batch_op:
+        batch_op.create_foreign_key('fk_track_catalog', 'catalog_track', ['spotify_track_id'], ['spotify_track_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('track', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_track_catalog', type_='foreignkey')
+
+    op.drop_table('catalog_track')
@@ -0,0 +1,171 @@
+"""Benchmark the name and rating lookups before and after migration b2d47e91c3a6.
+
+Fills a SQLite database with the pre-migration schema (track with
+unique_track_per_playlist and the keyset index, user_rating with no index) and
+times the lookups the services do:
+
+- track by (playlist_id, name) exact, served by unique_track_per_playlist
+- track by (playlist_id, name) through Track.name.ilike(), i.e. lower(name) LIKE lower(?)
+- user_rating by (user_id, spotify_track_id)
+
+It then applies the migration (name_lower column + backfill, and the
+(playlist_id, name_lower) and (user_id, spotify_track_id) indexes) and times the
+same lookups again, with the ilike replaced by the name_lower equality the
+services use now.
+
+    python scripts/bench_lookup_indexes.py --tracks 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.spotify_ids import int_to_id  # noqa: E402
+
+SCHEMA = [
+    "CREATE TABLE track (id INTEGER PRIMARY KEY, name VARCHAR(200) NOT NULL, artist VARCHAR(200), "
+    "spotify_track_id VARCHAR(200) NOT NULL, playlist_id INTEGER NOT NULL, "
+    "CONSTRAINT unique_track_per_playlist UNIQUE (playlist_id, name))",
+    "CREATE INDEX ix_track_playlist_id_id ON track (playlist_id, id)",
+    "CREATE TABLE user_rating (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, "
+    "spotify_track_id VARCHAR(200) NOT NULL, rating INTEGER NOT NULL)",
+]
+
+# What b2d47e91c3a6 does (favorite gets the same composite as user_rating)
+MIGRATION = [
+    "ALTER TABLE track ADD COLUMN name_lower VARCHAR(200)",
+    "UPDATE track SET name_lower = py_lower(name)",
+    "CREATE INDEX ix_track_playlist_id_name_lower ON track (playlist_id, name_lower)",
+    "CREATE INDEX ix_user_rating_user_id_spotify_track_id ON user_rating (user_id, spotify_track_id)",
+]
+
+QUERIES = {
+    "before": {
+        "track exact name": "SELECT id FROM track WHERE playlist_id = ? AND name = ?",
+        "track ilike name": "SELECT id FROM track WHERE playlist_id = ? AND lower(name) LIKE lower(?)",
+        "rating by user+track": "SELECT id FROM user_rating WHERE user_id = ? AND spotify_track_id = ?",
+    },
+    "after": {
+        "track exact name": "SELECT id FROM track WHERE playlist_id = ? AND name = ?",
+        "track name_lower": "SELECT id FROM track WHERE playlist_id = ? AND name_lower = ?",
+        "rating by user+track": "SELECT id FROM user_rating WHERE user_id = ? AND spotify_track_id = ?",
+    },
+}
+
+WORDS = ["love", "night", "fire", "dream", "heart", "city", "summer", "light", "rain", "gold", "wild", "blue",
+         "river", "ghost", "echo", "neon", "storm", "honey", "paper", "moon"]
+
+
+def track_name(i, rng):
+    return " ".join(rng.choice(WORDS).capitalize() for _ in range(rng.randint(1, 3))) + f" {i}"
+
+
+def fill(conn, args, rng, batch=50_000):
+    for statement in SCHEMA:
+        conn.execute(statement)
+    tracks, ratings = [], []
+    for start in range(0, args.tracks, batch):
+        rows = []
+        for i in range(start, min(start + batch, args.tracks)):
+            name, spotify_id = track_name(i, rng), int_to_id(rng.getrandbits(128))
+            rows.append((name, "Artist", spotify_id, i // args.tracks_per_playlist))
+            if len(tracks) < args.lookups:
+                tracks.append((i // args.tracks_per_playlist, name))
+            if len(ratings) < args.lookups:
+                ratings.append((i % args.users, spotify_id))
+        conn.executemany("INSERT INTO track (name, artist, spotify_track_id, playlist_id) VALUES (?, ?, ?, ?)", rows)
+    for start in range(0, args.ratings, batch):
+        conn.executemany(
+            "INSERT INTO user_rating (user_id, spotify_track_id, rating) VALUES (?, ?, ?)",
+            ((i % args.users, int_to_id(rng.getrandbits(128)), rng.randint(1, 5))
+             for i in range(start, min(start + batch, args.ratings)))
+        )
+    conn.executemany("INSERT INTO user_rating (user_id, spotify_track_id, rating) VALUES (?, ?, 5)", ratings)
+    conn.commit()
+    rng.shuffle(tracks)
+    rng.shuffle(ratings)
+    return tracks, ratings
+
+
+def time_query(conn, sql, params):
+    plan = "; ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params[0]))
+    for p in params[:50]:
+        conn.execute(sql, p).fetchall()  # Warm the page cache
+    latencies = []
+    for p in params:
+        started = time.perf_counter()
+        row = conn.execute(sql, p).fetchone()
+        latencies.append(time.perf_counter() - started)
+        assert row is not None
+    latencies.sort()
+    return latencies[len(latencies) // 2] * 1e6, latencies[int(len(latencies) * 0.99)] * 1e6, plan
+
+
+def run(conn, label, queries, tracks, ratings):
+    results = {}
+    for name, sql in queries.items():
+        if name.startswith("rating"):
+            params = ratings
+        elif name == "track exact name":
+            params = tracks
+        else:
+            # Clients send names in whatever case they typed
+            params = [(playlist_id, name.swapcase()) for playlist_id, name in tracks]
+            if name == "track name_lower":
+                params = [(playlist_id, name.lower()) for playlist_id, name in params]
+        results[name] = time_query(conn, sql, params)
+    print(f"\n{label}")
+    print(f"{'lookup':<24}{'p50 us':>12}{'p99 us':>12}  plan")
+    for name, (p50, p99, plan) in results.items():
+        print(f"{name:<24}{p50:>12.1f}{p99:>12.1f}  {plan}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=1_000_000)
+    parser.add_argument("--tracks-per-playlist", type=int, default=1_000)
+    parser.add_argument("--ratings", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--lookups", type=int, default=500, help="Probes per lookup (unindexed ones scan the table)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--dir", help="Where to write the database (default: a temporary directory)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    workdir = args.dir or tempfile.mkdtemp(prefix="bench-lookup-indexes-")
+    os.makedirs(workdir, exist_ok=True)
+    path = os.path.join(workdir, "lookups.db")
+    if os.path.exists(path):
+        os.remove(path)
+
+    conn = sqlite3.connect(path)
+    # SQLite's lower() is ASCII-only, the migration backfills with Python's like the model does
+    conn.create_function("py_lower", 1, lambda value: value.lower() if value is not None else None)
+    print(f"Filling {args.tracks:,} tracks in {args.tracks // args.tracks_per_playlist:,} playlists "
+          f"and {args.ratings:,} ratings ({workdir})...")
+    tracks, ratings = fill(conn, args, rng)
+
+    before = run(conn, "without b2d47e91c3a6", QUERIES["before"], tracks, ratings)
+
+    started = time.perf_counter()
+    for statement in MIGRATION:
+        conn.execute(statement)
+    conn.commit()
+    migrate_seconds = time.perf_counter() - started
+
+    after = run(conn, f"with b2d47e91c3a6 (migration took {migrate_seconds:.1f}s)", QUERIES["after"], tracks, ratings)
+    conn.close()
+
+    print("\nspeedup at p50:")
+    print(f"  ilike -> name_lower:   {before['track ilike name'][0] / after['track name_lower'][0]:,.0f}x")
+    print(f"  rating by user+track:  {before['rating by user+track'][0] / after['rating by user+track'][0]:,.0f}x")
+
+
+if __name__ == "__main__":
+    main()
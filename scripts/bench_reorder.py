@@ -0,0 +1,96 @@
+"""Benchmark the LIS reorder planner on large playlists.
+
+For several kinds of change to an n-track playlist (default 10k), it plans the
+range moves with app.reorder.plan_moves. It replays them to check the result
+and reports planning time and Spotify API calls. The naive approaches it is
+compared with are:
+
+- replace: rewrite the item list (1 replace + adds of 100 URIs, ceil(n/100)
+  calls); this loses every track's added_at
+- misplaced: tracks whose index changes, i.e. what moving every track that
+  is not in its target slot would touch
+
+    python scripts/bench_reorder.py --tracks 10000
+"""
+import argparse
+import math
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.reorder import plan_moves  # noqa: E402
+
+
+def apply(order, moves):
+    order = list(order)
+    for start, length, insert_before in moves:
+        segment = order[start:start + length]
+        del order[start:start + length]
+        position = insert_before - length if insert_before > start else insert_before
+        order[position:position] = segment
+    return order
+
+
+def relocate(tracks, count, rng):
+    target = list(tracks)
+    for _ in range(count):
+        target.insert(rng.randrange(len(target)), target.pop(rng.randrange(len(target))))
+    return target
+
+
+def move_block(tracks, size, rng):
+    target = list(tracks)
+    start = rng.randrange(len(target) - size)
+    block = target[start:start + size]
+    del target[start:start + size]
+    insert = rng.randrange(len(target))
+    target[insert:insert] = block
+    return target
+
+
+def swap_pairs(tracks, count, rng):
+    target = list(tracks)
+    for _ in range(count):
+        i, j = rng.randrange(len(target)), rng.randrange(len(target))
+        target[i], target[j] = target[j], target[i]
+    return target
+
+
+def scenarios(tracks, rng):
+    yield "unchanged", list(tracks)
+    for count in (1, 10, 100, 1000):
+        yield f"relocate {count} tracks", relocate(tracks, count, rng)
+    yield "move a 500-track block", move_block(tracks, 500, rng)
+    yield "swap 50 pairs", swap_pairs(tracks, 50, rng)
+    yield "reverse", list(reversed(tracks))
+    shuffled = list(tracks)
+    rng.shuffle(shuffled)
+    yield "full shuffle", shuffled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    current = [f"track{i:06d}" for i in range(args.tracks)]
+    replace_calls = math.ceil(args.tracks / 100)
+
+    print(f"{args.tracks:,}-track playlist; replace costs {replace_calls} calls and resets added_at\n")
+    print(f"{'change':<26}{'misplaced':>10}{'LIS moves':>11}{'replace':>9}{'plan ms':>10}")
+    for name, target in scenarios(current, rng):
+        started = time.perf_counter()
+        moves = plan_moves(current, target)
+        plan_ms = (time.perf_counter() - started) * 1000
+        assert apply(current, moves) == target, f"{name}: replayed moves do not produce the target"
+        misplaced = sum(a != b for a, b in zip(current, target))
+        print(f"{name:<26}{misplaced:>10,}{len(moves):>11,}{replace_calls:>9,}{plan_ms:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Benchmark the local BM25 search index over a generated catalog.
+
+Builds BM25Index from synthetic catalog rows. Names and albums use a
+Zipf-distributed vocabulary, and each artist has one to three genres. It
+reports build time, on-disk size (len(dumps())), reload time and search()
+latency percentiles for free-text queries like the text-playlist endpoint gets,
+both pruned (the default) and exhaustive (max_postings=None), plus how many of
+the exhaustive top results the pruned search returns.
+
+    python scripts/bench_search_index.py --tracks 200000
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+from functools import partial
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.search_index import BM25Index, MAX_POSTINGS_WALKED  # noqa: E402
+from app.spotify_ids import int_to_id  # noqa: E402
+
+GENRES = [
+    "pop", "dance pop", "indie rock", "alt rock", "hip hop", "trap", "rnb", "soul", "jazz", "bebop",
+    "classical", "ambient", "techno", "house", "deep house", "drum and bass", "metal", "punk", "folk",
+    "country", "reggae", "latin", "k-pop", "synthwave", "lo-fi", "blues", "gospel", "edm", "grunge", "disco"
+]
+SYLLABLES = ["la", "mo", "ri", "ka", "ne", "so", "ta", "vi", "lu", "po", "mi", "da", "ze", "ro", "fa", "gu"]
+
+
+def make_vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_catalog(tracks, rng, vocabulary_size=20_000):
+    vocabulary = make_vocabulary(vocabulary_size, rng)
+    # Zipf: a few words are very common (cumulative weights, so each draw is a bisect)
+    weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+
+    def phrase(low, high):
+        return " ".join(rng.choices(vocabulary, cum_weights=weights, k=rng.randint(low, high)))
+
+    artists = [(phrase(1, 2), ", ".join(rng.sample(GENRES, rng.randint(1, 3)))) for _ in range(max(1, tracks // 20))]
+    rows = []
+    for _ in range(tracks):
+        artist, genres = rng.choice(artists)
+        rows.append({
+            "spotify_track_id": int_to_id(rng.getrandbits(128)),
+            "name": phrase(1, 4),
+            "artist": artist,
+            "album": phrase(1, 3),
+            "genres": genres,
+            "popularity": rng.randint(0, 100)
+        })
+    return rows, vocabulary, weights
+
+
+def make_queries(count, rows, vocabulary, weights, rng):
+    queries = []
+    for _ in range(count):
+        row = rng.choice(rows)
+        terms = row["name"].split()[:2] + [rng.choice(GENRES)]
+        if rng.random() < 0.5:
+            terms += rng.choices(vocabulary, cum_weights=weights, k=1)
+        queries.append(" ".join(terms) + " songs")
+    return queries
+
+
+def run_queries(index, queries, limit, search):
+    for query in queries[:100]:
+        search(query, limit)  # Warm up
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        results.append(search(query, limit))
+        latencies.append(time.perf_counter() - started)
+    latencies.sort()
+    return results, latencies
+
+
+def percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20, help="Results per search (TEXT_PLAYLIST_SIZE)")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    rows, vocabulary, weights = make_catalog(args.tracks, rng)
+    queries = make_queries(args.queries, rows, vocabulary, weights, rng)
+
+    index = BM25Index()
+    started = time.perf_counter()
+    for row in rows:
+        index.add(row)
+    build_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    data = index.dumps()
+    dump_seconds = time.perf_counter() - started
+    started = time.perf_counter()
+    BM25Index.loads(data)
+    load_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    index.refresh_top_postings()
+    top_seconds = time.perf_counter() - started
+
+    pruned, pruned_latencies = run_queries(index, queries, args.limit, index.search)
+    exact, exact_latencies = run_queries(index, queries, args.limit, partial(index.search, max_postings=None))
+    hits = sum(bool(results) for results in exact)
+    found = sum(len({i for i, _ in p} & {i for i, _ in e}) for p, e in zip(pruned, exact))
+    wanted = sum(len(e) for e in exact) or 1
+
+    print(f"tracks indexed:   {len(index):,} ({len(index.postings):,} terms)")
+    print(f"build:            {build_seconds:.2f}s ({build_seconds / len(rows) * 1e6:.1f} us/track)")
+    print(f"on-disk size:     {len(data) / 2 ** 20:.2f} MiB ({len(data) / len(rows):.1f} bytes/track)")
+    print(f"dumps / loads:    {dump_seconds:.2f}s / {load_seconds:.2f}s")
+    print(f"top postings:     {top_seconds:.2f}s (terms in over {MAX_POSTINGS_WALKED:,} tracks)")
+    print(f"search (limit {args.limit}, {len(queries):,} queries, {hits / len(queries):.0%} with results):")
+    for label, latencies in (("pruned", pruned_latencies), ("exact", exact_latencies)):
+        print(f"  {label:<7}p50 {percentile(latencies, 0.50) * 1000:7.2f} ms   "
+              f"p90 {percentile(latencies, 0.90) * 1000:7.2f} ms   "
+              f"p99 {percentile(latencies, 0.99) * 1000:7.2f} ms   max {latencies[-1] * 1000:7.2f} ms")
+    print(f"  pruned results include {found / wanted:.1%} of the exact top {args.limit}")
+
+
+if __name__ == "__main__":
+    main()
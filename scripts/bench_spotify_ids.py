@@ -0,0 +1,117 @@
+"""Compare storing Spotify IDs as 22-character strings vs 16-byte binary in SQLite.
+
+Fills one database per form with the same rows (a track-like table with an
+index on the ID and a (user_id, ID) composite like user_rating). It then
+reports file size, per-index size and indexed lookup latency. Lookups include
+the base62 -> bytes conversion that SpotifyID does at the model boundary;
+p50_raw_us is the same lookup with the key already encoded.
+
+    python scripts/bench_spotify_ids.py --rows 1000000
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from app.spotify_ids import id_to_bytes, int_to_id  # noqa: E402
+
+FORMS = {
+    "string": ("VARCHAR(200)", lambda spotify_id: spotify_id),
+    "binary16": ("BLOB", id_to_bytes),
+}
+
+
+def build(path, column_type, encode, ids, batch=50_000):
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE track (id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, "
+                 f"spotify_track_id {column_type} NOT NULL)")
+    started = time.perf_counter()
+    for start in range(0, len(ids), batch):
+        conn.executemany(
+            "INSERT INTO track (user_id, spotify_track_id) VALUES (?, ?)",
+            ((i % 1000, encode(spotify_id)) for i, spotify_id in enumerate(ids[start:start + batch], start))
+        )
+    conn.execute("CREATE INDEX ix_track_spotify_track_id ON track (spotify_track_id)")
+    conn.execute("CREATE INDEX ix_track_user_id_spotify_track_id ON track (user_id, spotify_track_id)")
+    conn.commit()
+    load_seconds = time.perf_counter() - started
+    conn.execute("VACUUM")
+    return conn, load_seconds
+
+
+def index_sizes(conn):
+    try:
+        return dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name").fetchall())
+    except sqlite3.OperationalError:
+        return {}  # SQLite built without the dbstat table
+
+
+def time_lookups(conn, encode, probes):
+    latencies = []
+    for spotify_id in probes:
+        started = time.perf_counter()
+        row = conn.execute("SELECT id FROM track WHERE spotify_track_id = ?", (encode(spotify_id),)).fetchone()
+        latencies.append(time.perf_counter() - started)
+        assert row is not None
+    latencies.sort()
+    return {
+        "p50_us": latencies[len(latencies) // 2] * 1e6,
+        "p99_us": latencies[int(len(latencies) * 0.99)] * 1e6,
+        "mean_us": statistics.fmean(latencies) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--dir", help="Where to write the databases (default: a temporary directory)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"Generating {args.rows:,} Spotify IDs...")
+    ids = [int_to_id(rng.getrandbits(128)) for _ in range(args.rows)]
+    probes = [rng.choice(ids) for _ in range(args.lookups)]
+
+    workdir = args.dir or tempfile.mkdtemp(prefix="bench-spotify-ids-")
+    os.makedirs(workdir, exist_ok=True)
+    results = {}
+    for form, (column_type, encode) in FORMS.items():
+        path = os.path.join(workdir, f"{form}.db")
+        if os.path.exists(path):
+            os.remove(path)
+        conn, load_seconds = build(path, column_type, encode, ids)
+        sizes = index_sizes(conn)
+        time_lookups(conn, encode, probes[:1000])  # Warm the page cache
+        results[form] = dict(
+            file_mb=os.path.getsize(path) / 2 ** 20,
+            table_mb=sizes.get("track", 0) / 2 ** 20,
+            id_index_mb=sizes.get("ix_track_spotify_track_id", 0) / 2 ** 20,
+            composite_index_mb=sizes.get("ix_track_user_id_spotify_track_id", 0) / 2 ** 20,
+            load_s=load_seconds,
+            **time_lookups(conn, encode, probes),
+            p50_raw_us=time_lookups(conn, lambda key: key, [encode(p) for p in probes])["p50_us"]
+        )
+        conn.close()
+
+    columns = ["file_mb", "table_mb", "id_index_mb", "composite_index_mb", "load_s", "p50_us", "p99_us", "mean_us",
+               "p50_raw_us"]
+    print(f"\n{args.rows:,} rows, {args.lookups:,} indexed lookups ({workdir})")
+    print(f"{'form':<10}" + "".join(f"{c:>19}" for c in columns))
+    for form, row in results.items():
+        print(f"{form:<10}" + "".join(f"{row[c]:>19.2f}" for c in columns))
+    base, compact = results["string"], results["binary16"]
+    print(f"\nbinary16 vs string: file {compact['file_mb'] / base['file_mb']:.0%}, "
+          f"ID index {compact['id_index_mb'] / base['id_index_mb']:.0%}, "
+          f"p50 lookup {compact['p50_us'] / base['p50_us']:.0%}")
+
+
+if __name__ == "__main__":
+    main()
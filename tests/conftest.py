@@ -0,0 +1,65 @@
+import os
+
+#  Configure before the app (and config.Config) is imported
+os.environ["DATABASE_URL"] = "sqlite://"
+os.environ["SCHEDULER_ENABLED"] = "false"
+os.environ.pop("REDIS_URL", None)
+
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from app import create_app, db
+from app.models import User
+
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config["TESTING"] = True
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def user(app):
+    user = User(username="listener", password_hash="x")
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+@pytest.fixture
+def auth_headers(user):
+    return {"Authorization": f"Bearer {create_access_token(identity=str(user.id))}"}
+
+
+class QueryCounter:
+    """Counts SQL statements sent through the engine while active."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+
+@pytest.fixture
+def count_queries(app):
+    """Return a function that runs a callable and reports (result, statements executed)."""
+    def run(fn):
+        counter = QueryCounter()
+        event.listen(db.engine, "before_cursor_execute", counter)
+        try:
+            return fn(), counter.count
+        finally:
+            event.remove(db.engine, "before_cursor_execute", counter)
+    return run
@@ -0,0 +1,75 @@
+from app import db
+from app.models import CatalogTrack, Playlist, Track, TrackComment
+from app.spotify_ids import int_to_id
+
+_next_id = iter(range(10 ** 20, 10 ** 21))
+
+
+def _add_playlist(user, name, tracks=3):
+    playlist = Playlist(user_id=user.id, name=name)
+    db.session.add(playlist)
+    db.session.flush()
+    for i in range(tracks):
+        spotify_id = int_to_id(next(_next_id))
+        db.session.add(CatalogTrack(spotify_track_id=spotify_id, name=f"{name} {i}", artist="Artist"))
+        db.session.add(Track(name=f"{name} {i}", artist="Artist", playlist_id=playlist.id,
+                             spotify_track_id=spotify_id))
+    db.session.commit()
+    return playlist
+
+
+def _add_comments(user, track, count):
+    for i in range(count):
+        db.session.add(TrackComment(user_id=user.id, track_id=track.id, comment=f"comment {i}"))
+    db.session.commit()
+
+
+def _get(client, count_queries, url, headers):
+    response, queries = count_queries(lambda: client.get(url, headers=headers))
+    assert response.status_code == 200, response.get_json()
+    db.session.expire_all()  # Each request must load what it needs itself
+    return response.get_json(), queries
+
+
+def test_playlist_listing_query_count_is_constant(client, user, auth_headers, count_queries):
+    _add_playlist(user, "first")
+    body, baseline = _get(client, count_queries, "/user/playlists", auth_headers)
+    assert len(body["playlists"]) == 1
+
+    for i in range(10):
+        _add_playlist(user, f"more {i}", tracks=5)
+    body, queries = _get(client, count_queries, "/user/playlists", auth_headers)
+
+    assert len(body["playlists"]) == 11
+    assert sum(len(p["tracks"]) for p in body["playlists"]) == 53
+    assert queries == baseline
+
+
+def test_track_comment_listing_query_count_is_constant(client, user, auth_headers, count_queries):
+    playlist = _add_playlist(user, "commented", tracks=1)
+    track = Track.query.filter_by(playlist_id=playlist.id).one()
+    url = f"/music/feedback?playlist_name=commented&track_name={track.name}"
+
+    _add_comments(user, track, 1)
+    body, baseline = _get(client, count_queries, url, auth_headers)
+    assert len(body["comments"]) == 1
+
+    _add_comments(user, track, 15)
+    body, queries = _get(client, count_queries, url, auth_headers)
+    assert len(body["comments"]) == 16
+    assert queries == baseline
+
+
+def test_user_comment_listing_query_count_is_constant(client, user, auth_headers, count_queries):
+    first = _add_playlist(user, "one", tracks=1)
+    _add_comments(user, Track.query.filter_by(playlist_id=first.id).one(), 1)
+    body, baseline = _get(client, count_queries, "/user/comments", auth_headers)
+    assert len(body["comments"]) == 1
+
+    # Comments spread over many tracks must not load each track separately
+    for i in range(8):
+        playlist = _add_playlist(user, f"many {i}", tracks=1)
+        _add_comments(user, Track.query.filter_by(playlist_id=playlist.id).one(), 2)
+    body, queries = _get(client, count_queries, "/user/comments", auth_headers)
+    assert len(body["comments"]) == 17
+    assert queries == baseline